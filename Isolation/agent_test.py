@@ -4,9 +4,14 @@ cases used by the project assistant are not public.
 """
 
 import unittest
+from unittest import mock
 
 import isolation
 import game_agent
+import endgame
+import transposition
+import evalcache
+import searchstats
 
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
@@ -15,7 +20,36 @@ from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
                         custom_score_2, custom_score_3)
 
 from importlib import reload
+import itertools
+import json
+import pickle
 import random
+import time
+import timeit
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def random_games(count, new_game, plies, rng=random, playable=False):
+    """Yield `count` games returned by `new_game()`, each advanced by a
+    random number of random moves between the bounds of the pair `plies`
+    (fewer if the game ends first). If `playable`, only the games in which the first player is
+    to move and has a legal move are kept.
+    """
+    while count:
+        game = new_game()
+        for _ in range(rng.randint(*plies)):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        if not playable or (game.move_count % 2 == 0 and game.get_legal_moves()):
+            count -= 1
+            yield game
+
 
 class IsolationTest(unittest.TestCase):
     """Unit tests for isolation agents"""
@@ -130,9 +164,1305 @@ class IsolationTest(unittest.TestCase):
         print("Move history:\n{!s}".format(history))
 
 
+    def test_search_leaves_board_unchanged(self):
+        for player in (MinimaxPlayer(), AlphaBetaPlayer()):
+            game = isolation.Board(player, "Player2")
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            before = (game.to_string(), game.hash(), game.move_count)
+            player.time_left = lambda: 1000.
+            if isinstance(player, MinimaxPlayer):
+                player.minimax(game, 3)
+            else:
+                player.alphabeta(game, 3)
+            self.assertEqual(before, (game.to_string(), game.hash(), game.move_count))
+
+
+class UndoMoveTest(unittest.TestCase):
+    """Check that undo_move exactly reverses apply_move"""
+
+    def test_undo_random_games(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class("Player1", "Player2")
+            history = []
+            while True:
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                state = (game.to_string(), game.hash(), game.move_count,
+                         game.active_player, sorted(game.get_legal_moves()))
+                history.append((state, game.apply_move(random.choice(moves))))
+            while history:
+                state, undo = history.pop()
+                game.undo_move(undo)
+                self.assertEqual(state, (game.to_string(), game.hash(), game.move_count,
+                                         game.active_player, sorted(game.get_legal_moves())))
+
+
+class BoardCopyTest(unittest.TestCase):
+    """Check the compact board representations and their copies"""
+
+    def test_copy_is_independent(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class("Player1", "Player2")
+            self.assertFalse(hasattr(game, "__dict__"))
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            clone = game.copy()
+            self.assertIs(type(clone), board_class)
+            self.assertTrue(clone.same_state(game))
+            clone.apply_move((4, 4))
+            self.assertFalse(clone.same_state(game))
+            self.assertEqual(game.get_player_location("Player1"), (2, 3))
+            self.assertEqual(clone.get_player_location("Player1"), (4, 4))
+            self.assertEqual(game.move_count, 2)
+            self.assertNotIn((4, 4), set(clone.get_blank_spaces()))
+            self.assertIn((4, 4), set(game.get_blank_spaces()))
+
+    def test_subclass(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            subclass = type("Sub" + board_class.__name__, (board_class,), {"__slots__": ()})
+            game = subclass("Player1", "Player2")
+            game.apply_move((2, 3))
+            self.assertIs(type(game.copy()), subclass)
+            child = game.forecast_move((0, 5))
+            self.assertIs(type(child), subclass)
+            self.assertEqual(child.get_player_location("Player2"), (0, 5))
+
+
+class ZobristTest(unittest.TestCase):
+    """Check the incrementally maintained Zobrist keys"""
+
+    def full_key(self, game):
+        cell_keys, player_keys, initiative_key = isolation.zobrist_keys(game.width, game.height)
+        key = initiative_key if game.move_count % 2 else 0
+        for r, c in set(itertools.product(range(game.height), range(game.width))) - set(game.get_blank_spaces()):
+            key ^= cell_keys[r + c * game.height]
+        for keys, player in zip(player_keys, ("Player1", "Player2")):
+            loc = game.get_player_location(player)
+            if loc is not None:
+                key ^= keys[loc[0] + loc[1] * game.height]
+        return key
+
+    def test_incremental_key(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class("Player1", "Player2", 6, 5)
+            while game.get_legal_moves():
+                game.apply_move(random.choice(game.get_legal_moves()))
+                self.assertEqual(game.zobrist, self.full_key(game))
+                self.assertEqual(game.hash(), game.zobrist)
+
+    def test_transposition(self):
+        # (0, 0) -> (1, 2) -> (3, 3) -> (2, 1) and (3, 3) -> (1, 2) -> (0, 0) -> (2, 1)
+        # block the same cells and leave player 1 on the same square
+        games = []
+        for path in ([(0, 0), (1, 2), (3, 3), (2, 1)], [(3, 3), (1, 2), (0, 0), (2, 1)]):
+            game = isolation.Board("Player1", "Player2")
+            for move, reply in zip(path, [(6, 6), (4, 5), (2, 4), (0, 5)]):
+                self.assertTrue(game.move_count < 2 or move in game.get_legal_moves())
+                game.apply_move(move)
+                game.apply_move(reply)
+            games.append(game)
+        self.assertEqual(games[0].zobrist, games[1].zobrist)
+        self.assertTrue(games[0].same_state(games[1]))
+        games[1].apply_move((4, 4))
+        self.assertNotEqual(games[0].zobrist, games[1].zobrist)
+        self.assertFalse(games[0].same_state(games[1]))
+
+
+class MoveOrderTest(unittest.TestCase):
+    """Check the shuffle and seed options of the board classes"""
+
+    def play_out(self, game):
+        orders = []
+        while game.get_legal_moves():
+            moves = game.get_legal_moves()
+            orders.append(moves)
+            game = game.forecast_move(moves[0])
+        return orders
+
+    def test_seeded_games_repeat(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            first = self.play_out(board_class("Player1", "Player2", shuffle=True, seed=42))
+            second = self.play_out(board_class("Player1", "Player2", shuffle=True, seed=42))
+            self.assertEqual(first, second)
+
+    def test_no_shuffle(self):
+        game = isolation.Board("Player1", "Player2", shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        self.assertEqual(game.get_legal_moves(), [(1, 2), (1, 4), (2, 1), (2, 5),
+                                                  (4, 1), (4, 5), (5, 2), (5, 4)])
+        self.assertEqual(game.get_legal_moves("Player2"), [(1, 2), (2, 1)])
+
+
+class PartitionTest(unittest.TestCase):
+    """Check reachable_cells and is_partitioned against a simple search"""
+
+    def reachable(self, game, player):
+        start = game.get_player_location(player)
+        seen, frontier = set(), [start]
+        while frontier:
+            r, c = frontier.pop()
+            for dr, dc in [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]:
+                cell = (r + dr, c + dc)
+                if cell not in seen and cell in self.blank:
+                    seen.add(cell)
+                    frontier.append(cell)
+        return seen
+
+    def test_random_games(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            for _ in range(10):
+                game = board_class("Player1", "Player2", 7, 6)
+                game.apply_move(random.choice(game.get_legal_moves()))
+                self.assertFalse(game.is_partitioned())
+                game.apply_move(random.choice(game.get_legal_moves()))
+                while game.get_legal_moves():
+                    self.blank = set(game.get_blank_spaces())
+                    regions = [self.reachable(game, p) for p in ("Player1", "Player2")]
+                    self.assertEqual(set(game.reachable_cells("Player1")), regions[0])
+                    self.assertEqual(set(game.reachable_cells("Player2")), regions[1])
+                    self.assertEqual(game.is_partitioned(), not regions[0] & regions[1])
+                    game.apply_move(random.choice(game.get_legal_moves()))
+
+
+class SymmetryTest(unittest.TestCase):
+    """Check the canonical keys and boards of symmetric positions"""
+
+    def test_symmetric_positions(self):
+        for board_class, width, height in [(isolation.Board, 7, 7), (isolation.BitBoard, 7, 7),
+                                           (isolation.Board, 6, 5)]:
+            game = board_class("Player1", "Player2", width, height)
+            for _ in range(random.randint(1, 20)):
+                if not game.get_legal_moves():
+                    break
+                game.apply_move(random.choice(game.get_legal_moves()))
+            count = len(isolation.symmetries(width, height))
+            self.assertEqual(count, 8 if width == height else 4)
+            key, transform = game.canonical_key()
+            canonical, _ = game.canonical()
+            self.assertEqual(canonical.zobrist, key)
+            for t in range(count):
+                image = game.symmetric(t)
+                self.assertEqual(image.canonical_key()[0], key)
+                self.assertTrue(image.canonical()[0].same_state(canonical))
+                self.assertEqual(sorted(image.get_legal_moves()),
+                                 sorted(isolation.transform_move(m, t, width, height)
+                                        for m in game.get_legal_moves()))
+            moves = [isolation.transform_move(m, transform, width, height, inverse=True)
+                     for m in canonical.get_legal_moves()]
+            self.assertEqual(sorted(moves), sorted(game.get_legal_moves()))
+
+    def test_symmetric_zobrist(self):
+        game = isolation.Board("Player1", "Player2")
+        image = isolation.Board("Player1", "Player2")
+        for move in [(0, 1), (6, 6), (2, 2), (4, 5)]:
+            game.apply_move(move)
+            image.apply_move(isolation.transform_move(move, 5, 7, 7))
+        self.assertTrue(game.symmetric(5).same_state(image))
+        self.assertEqual(game.symmetric(5).zobrist, image.zobrist)
+        self.assertEqual(game.canonical_key()[0], image.canonical_key()[0])
+
+
+class EndgameTest(unittest.TestCase):
+    """Check the endgame solver against an exhaustive longest path search"""
+
+    def longest(self, loc, blank):
+        best = 0
+        r, c = loc
+        for dr, dc in [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]:
+            cell = (r + dr, c + dc)
+            if cell in blank:
+                best = max(best, 1 + self.longest(cell, blank - {cell}))
+        return best
+
+    def partitioned_games(self, count, width, height, player_1="Player1", player_2="Player2"):
+        games = []
+        while len(games) < count:
+            game = isolation.Board(player_1, player_2, width, height)
+            while game.get_legal_moves() and not game.is_partitioned():
+                game.apply_move(random.choice(game.get_legal_moves()))
+            if game.is_partitioned():
+                games.append(game)
+        return games
+
+    def test_exact_lengths(self):
+        for game in self.partitioned_games(30, 5, 5):
+            blank = set(game.get_blank_spaces())
+            result = endgame.solve(game)
+            self.assertEqual(result.active_length,
+                             self.longest(game.get_player_location(game.active_player), blank))
+            self.assertEqual(result.inactive_length,
+                             self.longest(game.get_player_location(game.inactive_player), blank))
+            if result.active_length:
+                self.assertIn(result.best_move, game.get_legal_moves())
+                self.assertEqual(self.longest(result.best_move, blank - {result.best_move}),
+                                 result.active_length - 1)
+            else:
+                self.assertEqual(result.best_move, (-1, -1))
+
+    def test_not_partitioned(self):
+        game = isolation.Board("Player1", "Player2")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        self.assertIsNone(endgame.solve(game))
+
+    def test_alphabeta_uses_solver(self):
+        players = (AlphaBetaPlayer(), AlphaBetaPlayer())
+        for game in self.partitioned_games(10, 5, 6, *players):
+            result = endgame.solve(game)
+            move = game.active_player.get_move(game, lambda: 1000.)
+            self.assertEqual(move, result.best_move)
+
+
+class PlayTelemetryTest(unittest.TestCase):
+    """Check the per-move records reported by Board.play"""
+
+    def test_records(self):
+        player1, player2 = RandomPlayer(), RandomPlayer()
+        game = isolation.Board(player1, player2)
+        records = []
+        winner, history, outcome = game.play(on_move=records.append)
+        self.assertEqual(len(records), len(history) + 1)
+        self.assertEqual([r.ply for r in records], list(range(len(records))))
+        self.assertEqual(records[-1].legal_moves, 0)
+        for record in records:
+            self.assertIn(record.player, (player1, player2))
+            self.assertAlmostEqual(record.elapsed + record.time_left, isolation.isolation.TIME_LIMIT_MILLIS)
+
+        summary = isolation.latency_summary(records)
+        self.assertEqual(set(summary), {player1, player2})
+        self.assertEqual(sum(stats["count"] for stats in summary.values()), len(records))
+        for player, stats in summary.items():
+            elapsed = [r.elapsed for r in records if r.player == player]
+            self.assertEqual(stats["max"], max(elapsed))
+            self.assertTrue(min(elapsed) <= stats["p50"] <= stats["p95"] <= stats["p99"] <= stats["max"])
+
+
+class BoardViewTest(unittest.TestCase):
+    """Check that players cannot modify the referee's board"""
+
+    class MutatingPlayer(RandomPlayer):
+        """Random player that scribbles on the board it receives"""
+
+        def get_move(self, game, time_left):
+            before = game.to_string()
+            move = super().get_move(game, time_left)
+            if move != (-1, -1):
+                undo = game.apply_move(move)
+                game.undo_move(undo)
+                game.apply_move(move)
+                assert game.to_string() != before
+            return move
+
+    def test_view_is_copy_on_write(self):
+        board = isolation.Board("Player1", "Player2")
+        board.apply_move((2, 3))
+        view = isolation.BoardView(board)
+        self.assertEqual(sorted(view.get_legal_moves()), sorted(board.get_legal_moves()))
+        self.assertEqual(view.active_player, "Player2")
+        with self.assertRaises(AttributeError):
+            view.move_count = 5
+        view.apply_move((0, 5))
+        self.assertEqual(board.move_count, 1)
+        self.assertEqual(view.move_count, 2)
+        self.assertIsNone(board.get_player_location("Player2"))
+        self.assertEqual(view.get_player_location("Player2"), (0, 5))
+
+    def check_copy(self, copy_fn):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            board = board_class("Player1", "Player2")
+            board.apply_move((2, 3))
+            view = isolation.BoardView(board)
+            copied = copy_fn(view)
+            self.assertIsInstance(copied, board_class)
+            self.assertEqual(copied.to_string(), board.to_string())
+            self.assertEqual(copied.zobrist, board.zobrist)
+            copied.apply_move((0, 5))
+            self.assertEqual(board.move_count, 1)
+            self.assertEqual(view.move_count, 1)
+
+    def test_copy(self):
+        import copy
+        self.check_copy(copy.copy)
+
+    def test_deepcopy(self):
+        import copy
+        self.check_copy(copy.deepcopy)
+
+    def test_pickle(self):
+        self.check_copy(lambda view: pickle.loads(pickle.dumps(view)))
+
+    def test_private_attributes(self):
+        view = isolation.BoardView(isolation.Board("Player1", "Player2"))
+        with self.assertRaises(AttributeError):
+            view._blanks
+        self.assertFalse(hasattr(object.__new__(isolation.BoardView), "_board"))
+
+    def test_play_with_mutating_players(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class(self.MutatingPlayer(), self.MutatingPlayer())
+            winner, history, outcome = game.play()
+            self.assertEqual(outcome, "illegal move")
+            self.assertEqual(game.move_count, len(history))
+            replay = board_class("Player1", "Player2")
+            for move in history:
+                replay.apply_move(tuple(move))
+            self.assertEqual(game.to_string(), replay.to_string())
+
+
+class LargeBoardTest(unittest.TestCase):
+    """Check blank cell tracking, copying and rendering on large boards"""
+
+    def test_blank_spaces(self):
+        for board_class, size in itertools.product((isolation.Board, isolation.BitBoard),
+                                                   (7, 15, 25)):
+            game = board_class("Player1", "Player2", size, size, shuffle=True, seed=size)
+            copies = []
+            while True:
+                blanks = sorted((i, j) for j in range(size) for i in range(size)
+                                if game.move_is_legal((i, j)))
+                self.assertEqual(sorted(game.get_blank_spaces()), blanks)
+                copies.append((game.copy(), blanks))
+                moves = game.get_legal_moves()
+                if not moves or game.move_count > 4:
+                    break
+                undo = game.apply_move(moves[0])
+                game.undo_move(undo)
+                self.assertEqual(sorted(game.get_blank_spaces()), blanks)
+                game.apply_move(moves[-1])
+            for copy, blanks in copies:
+                self.assertEqual(sorted(copy.get_blank_spaces()), blanks)
+                # the open cells of a state set directly
+                game._set_state(copy._blocked_mask(), copy._p1_loc, copy._p2_loc,
+                                copy.move_count, copy.zobrist)
+                self.assertEqual(sorted(game.get_blank_spaces()), blanks)
+                self.assertEqual(sorted(game.get_legal_moves()),
+                                 sorted(copy.get_legal_moves()))
+
+    def test_to_string(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class("Player1", "Player2", 15, 15, shuffle=False)
+            game.apply_move((14, 0))
+            game.apply_move((0, 10))
+            game.apply_move((12, 1))
+            rows = game.to_string().split('\n\r')
+            self.assertEqual(rows[0].split(), [str(c) for c in range(15)])
+            self.assertEqual(rows[1].split('|')[11], ' 2 ')
+            self.assertEqual(rows[13].split('|')[2], ' 1 ')
+            self.assertEqual(rows[15].split('|')[1], ' - ')
+            self.assertEqual(rows[8].split('|')[1:-1], ['   '] * 15)
+
+
+class TranspositionTest(unittest.TestCase):
+    """Check the transposition table and its use by AlphaBetaPlayer"""
+
+    def test_replacement(self):
+        table = transposition.TranspositionTable(8)
+        self.assertEqual(table.capacity, 8)
+        table.store(1, 3, transposition.EXACT, 1., (0, 0))
+        table.store(5, 1, transposition.LOWER, 2., (1, 1))
+        table.store(9, 2, transposition.UPPER, 3., (2, 2))
+        # the deep entry stays, the always-replace entry takes the latest
+        self.assertEqual(table.probe(1).depth, 3)
+        self.assertIsNone(table.probe(5))
+        self.assertEqual(table.probe(9).move, (2, 2))
+        # entries from an earlier search give up their depth-preferred slot
+        table.new_search()
+        table.store(13, 1, transposition.EXACT, 4., None)
+        self.assertEqual(table.probe(13).value, 4.)
+        self.assertEqual(table.probe(1).value, 1.)
+        self.assertIsNone(table.probe(9))
+        self.assertEqual(len(table), 2)
+        table.clear()
+        self.assertEqual(len(table), 0)
+        self.assertIsNone(table.probe(1))
+        table.store(1, 1, transposition.EXACT, 5., None)
+        self.assertEqual(table.probe(1).value, 5.)
+        self.assertEqual(len(table), 1)
+
+    def test_capacity(self):
+        for max_entries, capacity in ((2, 2), (3, 2), (4, 4), (7, 4), (2 ** 10, 2 ** 10)):
+            self.assertEqual(transposition.TranspositionTable(max_entries).capacity, capacity)
+        self.assertRaises(ValueError, transposition.TranspositionTable, 1)
+
+    def test_export(self):
+        table = transposition.TranspositionTable(16)
+        table.store(1, 3, transposition.EXACT, 1., (0, 0))
+        table.new_search()
+        table.store(2, 1, transposition.LOWER, 2., None)
+        table.store(3, 2, transposition.UPPER, 3., (4, 5))
+        # only the deep enough entries of the current search are exported
+        other = transposition.TranspositionTable(16)
+        other.merge(table.export(min_depth=2))
+        self.assertEqual(len(other), 1)
+        self.assertEqual(other.probe(3)[:5], table.probe(3)[:5])
+        other.merge(table.export())
+        self.assertIsNone(other.probe(2).move)
+        self.assertIsNone(other.probe(1))
+
+    def minimax_value(self, game, depth, player, score_fn):
+        if depth == 0 or not game.get_legal_moves():
+            return score_fn(game, player)
+        values = [self.minimax_value(game.forecast_move(m), depth - 1, player, score_fn)
+                  for m in game.get_legal_moves()]
+        return max(values) if game.active_player is player else min(values)
+
+    def test_same_values(self):
+        self.check_values()
+
+    def check_values(self, **kwargs):
+        """Check that iterative deepening searches pick moves with the best
+        minimax value at each depth.
+        """
+        random.seed(7)
+        for _ in range(10):
+            player = AlphaBetaPlayer(score_fn=improved_score, **kwargs)
+            try:
+                opponent = RandomPlayer()
+                game = isolation.Board(player, opponent, shuffle=False)
+                for _ in range(random.randint(2, 12)):
+                    moves = game.get_legal_moves()
+                    if not moves:
+                        break
+                    game.apply_move(random.choice(moves))
+                if not game.get_legal_moves():
+                    continue
+                if game.active_player is not player:
+                    game = isolation.Board(opponent, player, shuffle=False)
+                    game.apply_move((0, 0))
+                player.time_left = lambda: 1000.
+                for depth in (1, 2, 3, 4):
+                    move = player._search_iteration(game, depth)
+                    value = self.minimax_value(game.forecast_move(move), depth - 1,
+                                               player, improved_score)
+                    best = max(self.minimax_value(game.forecast_move(m), depth - 1,
+                                                  player, improved_score)
+                               for m in game.get_legal_moves())
+                    self.assertEqual(value, best)
+            finally:
+                player.close()
+
+    def count_evaluations(self, depth, **kwargs):
+        """Count the evaluations of iterative deepening searches up to
+        `depth` plies from a few seeded positions.
+        """
+        calls = [0]
+
+        def counting_score(game, player):
+            calls[0] += 1
+            return improved_score(game, player)
+
+        rng = random.Random(3)
+        for _ in range(10):
+            player = AlphaBetaPlayer(score_fn=counting_score, **kwargs)
+            player.time_left = lambda: 1000.
+            game = isolation.Board(player, RandomPlayer(), shuffle=False)
+            for _ in range(rng.choice([4, 6, 8])):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            for d in range(1, depth + 1):
+                player.alphabeta(game, d)
+        return calls[0]
+
+    def test_fewer_evaluations(self):
+        self.assertLess(self.count_evaluations(6, move_ordering=False),
+                        self.count_evaluations(6, move_ordering=False, tt_size=0))
+
+
+class EvalCacheTest(unittest.TestCase):
+    """Check the evaluation cache and its use by the search players"""
+
+    def test_clock_eviction(self):
+        cache = evalcache.EvalCache(4)
+        self.assertEqual(cache.capacity, 4)
+        for key in (1, 2, 3, 4):
+            cache.store(key, float(key))
+        self.assertEqual(cache.probe(1), 1.)
+        self.assertEqual(cache.probe(3), 3.)
+        # the hand skips the entries that were found since it last passed
+        cache.store(5, 5.)
+        cache.store(6, 6.)
+        self.assertIsNone(cache.probe(2))
+        self.assertIsNone(cache.probe(4))
+        self.assertEqual([cache.probe(k) for k in (1, 3, 5, 6)], [1., 3., 5., 6.])
+        self.assertEqual(len(cache), 4)
+        self.assertEqual((cache.hits, cache.misses), (6, 2))
+        self.assertEqual(cache.hit_rate, .75)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.probe(1))
+
+    def test_cached_score(self):
+        score = game_agent.CachedScore(improved_score, 16)
+        rng = random.Random(5)
+        game = isolation.Board("Player1", "Player2")
+        for _ in range(30):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+            for player in ("Player1", "Player2"):
+                self.assertEqual(score(game, player), improved_score(game, player))
+                self.assertEqual(score(game, player), improved_score(game, player))
+        self.assertEqual(score.cache.hits, score.cache.misses)
+        self.assertLessEqual(len(score.cache), 16)
+
+    def test_search_values(self):
+        """Cached searches find the same values as uncached ones, and the
+        leaves of the search at the next move are found in the cache.
+        """
+        score = game_agent.CachedScore(improved_score)
+        rng = random.Random(11)
+        for _ in range(5):
+            players = [AlphaBetaPlayer(score_fn=fn, tt_size=0)
+                       for fn in (improved_score, score)]
+            game = isolation.Board(players[0], RandomPlayer(), shuffle=False)
+            for _ in range(rng.choice([4, 6, 8])):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            cached_game = game.with_players(players[1], game._player_2)
+            for player in players:
+                player.time_left = lambda: 1000.
+            for depth in range(1, 6):
+                move = players[0].alphabeta(game, depth)
+                self.assertEqual(players[1].alphabeta(cached_game, depth), move)
+                self.assertEqual(players[1].root_score, players[0].root_score)
+
+        player = MinimaxPlayer(score_fn=score)
+        player.time_left = lambda: 1000.
+        game = isolation.Board(player, RandomPlayer(), shuffle=False)
+        for _ in range(6):
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        move = player.minimax(game, 3)
+        game.apply_move(move)
+        game.apply_move(game.get_legal_moves()[0])
+        hits, misses = score.cache.hits, score.cache.misses
+        player.minimax(game, 1)
+        self.assertGreater(score.cache.hits, hits)
+        self.assertEqual(score.cache.hits - hits, len(game.get_legal_moves()))
+        self.assertEqual(score.cache.misses, misses)
+
+    def test_pickle(self):
+        score = game_agent.CachedScore(improved_score, 100)
+        score(isolation.Board("Player1", "Player2"), "Player1")
+        copy = pickle.loads(pickle.dumps(score))
+        self.assertEqual(copy, score)
+        self.assertEqual(hash(copy), hash(score))
+        self.assertEqual(copy.cache.capacity, 100)
+        self.assertEqual(len(copy.cache), 0)
+
+
+class SearchStatsTest(unittest.TestCase):
+    """Check the search statistics recorded by the players"""
+
+    def tree_size(self, game, depth):
+        """Return the number of nodes and leaves of a full-width search. """
+        moves = game.get_legal_moves()
+        if not moves:
+            return 1, 0
+        if depth == 0:
+            return 1, 1
+        nodes, leaves = 1, 0
+        for m in moves:
+            n, l = self.tree_size(game.forecast_move(m), depth - 1)
+            nodes, leaves = nodes + n, leaves + l
+        return nodes, leaves
+
+    def test_minimax_counts(self):
+        player = MinimaxPlayer(score_fn=improved_score)
+        player.stats = searchstats.SearchStats()
+        game = isolation.Board(player, RandomPlayer(), shuffle=False)
+        rng = random.Random(23)
+        for _ in range(8):
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        player.get_move(game, lambda: 1000.)
+        nodes, leaves = 0, 0
+        for m in game.get_legal_moves():
+            n, l = self.tree_size(game.forecast_move(m), player.search_depth - 1)
+            nodes, leaves = nodes + n, leaves + l
+        record, = player.stats.moves
+        self.assertEqual((record.ply, record.depth), (8, player.search_depth))
+        self.assertEqual((record.nodes, record.leaves), (nodes, leaves))
+        self.assertEqual(record.iteration_nodes, nodes)
+        self.assertEqual(record.cutoffs, 0)
+        self.assertAlmostEqual(record.branching_factor ** record.depth, nodes)
+
+    def test_alphabeta_game(self):
+        player = AlphaBetaPlayer(score_fn=game_agent.CachedScore(improved_score))
+        player.stats = searchstats.SearchStats()
+        game = isolation.Board(player, RandomPlayer())
+        game.play(time_limit=50)
+        self.assertGreater(len(player.stats.moves), 0)
+        for record in player.stats.moves:
+            self.assertEqual(record.ply % 2, 0)
+            self.assertGreaterEqual(record.nodes, record.leaves + record.expanded)
+            self.assertLessEqual(record.first_cutoffs, record.cutoffs)
+            self.assertLessEqual(record.cutoffs, record.expanded)
+            self.assertLessEqual(record.tt_hits, record.tt_probes)
+            self.assertEqual(record.cache_probes, record.leaves)
+            # a move can complete no iteration and keep the depth resumed
+            # from the search of the previous move
+            if record.iteration_nodes is not None:
+                self.assertIsNotNone(record.depth)
+                self.assertLessEqual(record.iteration_nodes, record.nodes)
+        summary = json.loads(player.stats.to_json())["summary"]
+        self.assertEqual(summary["moves"], len(player.stats.moves))
+        self.assertEqual(summary["nodes"], sum(r.nodes for r in player.stats.moves))
+        self.assertAlmostEqual(summary["nodes_per_second"],
+                               1000. * summary["nodes"] / summary["elapsed"])
+
+    def test_outside_moves(self):
+        stats = searchstats.SearchStats()
+        stats.add_search(100, 50)
+        stats.end_iteration()
+        self.assertIsNone(stats.end_move())
+        self.assertEqual(stats.moves, [])
+        self.assertEqual(stats.summary()["moves"], 0)
+
+    def test_mcts(self):
+        player = game_agent.MCTSPlayer(seed=1)
+        player.stats = searchstats.SearchStats()
+        game = isolation.Board(player, RandomPlayer())
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        player.get_move(game, lambda: 50.)
+        record, = player.stats.moves
+        self.assertEqual(record.nodes, player.playouts)
+        self.assertIsNone(record.depth)
+
+
+class MoveOrderingTest(unittest.TestCase):
+    """Check the killer move and history heuristics of AlphaBetaPlayer"""
+
+    count_evaluations = TranspositionTest.count_evaluations
+
+    def test_fewer_evaluations(self):
+        self.assertLess(self.count_evaluations(6),
+                        self.count_evaluations(6, move_ordering=False))
+
+    def test_cutoffs_recorded(self):
+        player = AlphaBetaPlayer(score_fn=improved_score)
+        player.time_left = lambda: 1000.
+        game = isolation.Board(player, RandomPlayer(), shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        deadline = timeit.default_timer() + 0.2
+        move = player.get_move(game, lambda: 1000 * (deadline - timeit.default_timer()))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(player.completed_depth, 1)
+        self.assertTrue(player._history)
+        for killers in player._killers:
+            self.assertLessEqual(len(killers), 2)
+            self.assertEqual(len(set(killers)), len(killers))
+
+
+class PrincipalVariationTest(unittest.TestCase):
+    """Check the PVS and aspiration window modes of AlphaBetaPlayer"""
+
+    check_values = TranspositionTest.check_values
+    minimax_value = TranspositionTest.minimax_value
+    count_evaluations = TranspositionTest.count_evaluations
+
+    def test_pvs_values(self):
+        self.check_values(pvs=True)
+        self.check_values(pvs=True, tt_size=0)
+
+    def test_aspiration_values(self):
+        self.check_values(aspiration_window=0.5)
+        self.check_values(aspiration_window=0.5, pvs=True)
+
+    def test_aspiration_research(self):
+        player = AlphaBetaPlayer(score_fn=improved_score, aspiration_window=1e-6)
+        player.time_left = lambda: 1000.
+        game = isolation.Board(player, RandomPlayer(), shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        player._search_iteration(game, 1)
+        player._search_iteration(game, 2)
+        player._search_iteration(game, 3)
+        reference = AlphaBetaPlayer(score_fn=improved_score)
+        reference.time_left = lambda: 1000.
+        game = isolation.Board(reference, RandomPlayer(), shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        reference.alphabeta(game, 3)
+        self.assertEqual(player.root_score, reference.root_score)
+
+    def test_null_window_pruning(self):
+        self.assertLess(self.count_evaluations(6, pvs=True),
+                        self.count_evaluations(6))
+
+
+class SearchReuseTest(unittest.TestCase):
+    """Check that AlphaBetaPlayer carries its search state between moves"""
+
+    def play_moves(self, player, game, plies):
+        for _ in range(plies):
+            if game.active_player is player:
+                deadline = timeit.default_timer() + 0.05
+                move = player.get_move(game, lambda: 1000 * (deadline - timeit.default_timer()))
+            else:
+                # reply with the move expected by the player, if any
+                entry = player.tt.probe(player._tt_key(game))
+                move = entry.move if entry else game.get_legal_moves()[0]
+            game.apply_move(move)
+
+    def test_resume(self):
+        player = AlphaBetaPlayer(score_fn=improved_score, solve_endgames=False)
+        game = isolation.Board(player, "Player2", shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        self.play_moves(player, game, 2)
+        self.assertGreater(len(player.tt), 0)
+        entry = player._start_search(game)
+        self.assertIsNotNone(entry)
+        self.assertGreater(entry.depth, 1)
+        self.assertIn(entry.move, game.get_legal_moves())
+
+    def test_new_game(self):
+        player = AlphaBetaPlayer(score_fn=improved_score, solve_endgames=False)
+        game = isolation.Board(player, "Player2", shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        self.play_moves(player, game, 4)
+        # a later position of a different game is not mistaken for this one
+        game = isolation.Board(player, "Player2", shuffle=False)
+        game.apply_move((0, 0))
+        game.apply_move((6, 6))
+        for move in ((1, 2), (4, 5), (3, 3), (2, 4)):
+            game.apply_move(move)
+        self.assertIsNone(player._start_search(game))
+        self.assertEqual(len(player.tt), 0)
+        self.assertEqual(player._history, {})
+
+    def test_no_reuse(self):
+        player = AlphaBetaPlayer(score_fn=improved_score, solve_endgames=False,
+                                 reuse_search=False)
+        game = isolation.Board(player, "Player2", shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        self.play_moves(player, game, 2)
+        self.assertIsNone(player._start_search(game))
+        self.assertEqual(len(player.tt), 0)
+
+
+class PonderTest(unittest.TestCase):
+    """Check that AlphaBetaPlayer searches on the opponent's time"""
+
+    class ObservingPlayer(RandomPlayer):
+        def __init__(self):
+            self.events = []
+
+        def move_applied(self, move):
+            self.events.append(("applied", move))
+
+        def opponent_moved(self, move):
+            self.events.append(("opponent", move))
+
+        def game_over(self, winner):
+            self.events.append(winner)
+
+    class CountdownEvent(object):
+        """A stop event that is set once it has been checked `checks` times"""
+
+        def __init__(self, checks):
+            self.checks = checks
+
+        def is_set(self):
+            self.checks -= 1
+            return self.checks < 0
+
+    class CountingPlayer(AlphaBetaPlayer):
+        pondered = 0
+
+        def stop_pondering(self):
+            if self._pondering:
+                self.pondered += 1
+            super().stop_pondering()
+
+    def ponder_game(self, mode):
+        """Return a player and a small board on which the player has just
+        moved, whose replies can be searched to the end in a fraction of a
+        second.
+        """
+        player = AlphaBetaPlayer(score_fn=improved_score, ponder=mode)
+        self.addCleanup(player.close)
+        game = isolation.Board(player, "Player2", 5, 4, shuffle=False)
+        for move in ((0, 0), (1, 1), (2, 1)):
+            game.apply_move(move)
+        return player, game
+
+    def root_keys(self, player, game, replies):
+        return [player._tt_key(game.forecast_move(m)) for m in replies]
+
+    def test_play_hooks(self):
+        player1, player2 = self.ObservingPlayer(), self.ObservingPlayer()
+        game = isolation.Board(player1, player2)
+        winner, history, outcome = game.play()
+        self.assertEqual(player1.events[-1], winner)
+        self.assertEqual(player2.events[-1], winner)
+        moves = [tuple(m) for m in history]
+        self.assertEqual(player1.events[:-1],
+                         [("opponent" if i & 1 else "applied", m) for i, m in enumerate(moves)])
+        self.assertEqual(player2.events[:-1],
+                         [("applied" if i & 1 else "opponent", m) for i, m in enumerate(moves)])
+
+    def test_stop(self):
+        player, game = self.ponder_game("all")
+        replies = game.get_legal_moves()
+        positions = [game.forecast_move(m) for m in replies]
+        positions = [p.with_players(*game_agent._seats(p, game_agent._ROOT_PLAYER))
+                     for p in positions]
+        settings = (improved_score, 10., 2 ** 12, True, False)
+        stop = self.CountdownEvent(0)
+        keys = game_agent._ponder_positions(positions, settings, stop)[0]
+        self.assertEqual(len(keys), 0)
+        # stopped half way, the search has filled the entries of every
+        # position up to the last completed round
+        stop = self.CountdownEvent(100)
+        entries = game_agent._ponder_positions(positions, settings, stop)
+        self.assertLess(stop.checks, 0)
+        depths = dict(zip(entries[0], entries[1]))
+        for key in self.root_keys(player, game, replies):
+            self.assertGreaterEqual(depths.get(key, 0), 2)
+
+    def test_harvest(self):
+        for mode in ("predicted", "all"):
+            player, game = self.ponder_game(mode)
+            replies = game.get_legal_moves()
+            player.start_pondering(game)
+            # the search of the small board ends by itself
+            self.assertTrue(player._ponder_conn.poll(60))
+            player.opponent_moved(replies[0])
+            self.assertFalse(player._pondering)
+            pondered = replies if mode == "all" else replies[:1]
+            for key in self.root_keys(player, game, replies):
+                entry = player.tt.probe(key)
+                if key in self.root_keys(player, game, pondered):
+                    self.assertGreaterEqual(entry.depth, 2)
+                else:
+                    self.assertIsNone(entry)
+
+    def test_restart(self):
+        player, game = self.ponder_game("predicted")
+        player.start_pondering(game)
+        player.stop_pondering()
+        self.assertFalse(player._pondering)
+        player.start_pondering(game)
+        self.assertTrue(player._ponder_conn.poll(60))
+        player.stop_pondering()
+        key = self.root_keys(player, game, game.get_legal_moves()[:1])[0]
+        self.assertIsNotNone(player.tt.probe(key))
+
+    def test_play(self):
+        # a wide timer margin, as both players share the processor with the
+        # background search
+        players = [self.CountingPlayer(score_fn=improved_score, timeout=50.,
+                                       ponder="all"),
+                   AlphaBetaPlayer(score_fn=improved_score, timeout=50.)]
+        self.addCleanup(players[0].close)
+        game = isolation.Board(*players)
+        winner, history, outcome = game.play()
+        self.assertNotEqual(outcome, "timeout")
+        self.assertGreater(players[0].pondered, 0)
+        self.assertFalse(players[0]._pondering)
+
+
+class ParallelSearchTest(unittest.TestCase):
+    """Check the root-parallel search of AlphaBetaPlayer"""
+
+    check_values = TranspositionTest.check_values
+    minimax_value = TranspositionTest.minimax_value
+
+    def test_pickle_board(self):
+        import pickle
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class("Player1", "Player2")
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            clone = pickle.loads(pickle.dumps(game.with_players("a", "b")))
+            self.assertIs(type(clone), board_class)
+            self.assertEqual(clone.active_player, "a")
+            self.assertEqual(clone.zobrist, game.zobrist)
+            self.assertEqual(clone.to_string(), game.to_string())
+
+    def test_root_moves(self):
+        player = AlphaBetaPlayer(score_fn=improved_score)
+        player.time_left = lambda: 1000.
+        game = isolation.Board(player, "Player2", shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        moves = game.get_legal_moves()
+        self.assertEqual(player.alphabeta(game, 3, root_moves=moves[-1:]), moves[-1])
+
+    def test_parallel_values(self):
+        with mock.patch.object(AlphaBetaPlayer, "PARALLEL_MIN_DEPTH", 3):
+            self.check_values(workers=2)
+        self.assertEqual(AlphaBetaPlayer.PARALLEL_MIN_DEPTH, 4)
+
+    def test_get_move(self):
+        player = AlphaBetaPlayer(score_fn=improved_score, workers=2)
+        try:
+            # the pool is started outside of the time limit of the move
+            self.assertIsNotNone(player._pool)
+            game = isolation.Board(player, RandomPlayer())
+            game.apply_move((3, 3))
+            game.apply_move((2, 2))
+            deadline = timeit.default_timer() + 0.5
+            time_left = lambda: 1000 * (deadline - timeit.default_timer())
+            move = player.get_move(game, time_left)
+            self.assertGreater(time_left(), 0)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertGreaterEqual(player.completed_depth, player.PARALLEL_MIN_DEPTH)
+        finally:
+            player.close()
+        self.assertIsNone(player._pool)
+
+
+class DeadlineTest(unittest.TestCase):
+    """Check the amortized timer checks of the search"""
+
+    def run_until_timeout(self, deadline, node_cost=0.):
+        ticks = 0
+        try:
+            while True:
+                deadline.tick()
+                ticks += 1
+                if node_cost:
+                    time.sleep(node_cost)
+        except game_agent.SearchTimeout:
+            return ticks
+
+    def run_with_clock(self, time_left, threshold, node_ns):
+        """Run a deadline to its timeout on a fake clock that advances by
+        `node_ns(tick)` nanoseconds at each tick, and return the overshoot
+        past the deadline (ns), the number of ticks and of clock readings.
+        """
+        clock = [0]
+        readings = [0]
+
+        def fake_clock():
+            readings[0] += 1
+            return clock[0]
+
+        with mock.patch.object(game_agent, "_clock_ns", fake_clock):
+            deadline = game_agent.Deadline(time_left, threshold)
+            ticks = 0
+            try:
+                while True:
+                    deadline.tick()
+                    ticks += 1
+                    clock[0] += node_ns(ticks)
+            except game_agent.SearchTimeout:
+                pass
+        return clock[0] - deadline.end, ticks, readings[0]
+
+    def test_overshoot(self):
+        # 20 ms of 1 us nodes: the clock is read about every CHECK_PERIOD_NS
+        overshoot, ticks, readings = self.run_with_clock(lambda: 30., 10., lambda _: 1000)
+        self.assertGreaterEqual(overshoot, 0)
+        self.assertLessEqual(overshoot, game_agent.Deadline.CHECK_PERIOD_NS)
+        self.assertGreaterEqual(ticks, 20000)
+        self.assertLess(readings, 2 * 20000000 // game_agent.Deadline.CHECK_PERIOD_NS)
+
+    def test_overshoot_slowdown(self):
+        # when nodes suddenly get slower, the overshoot is bounded by the
+        # interval set from the earlier nodes
+        overshoot, ticks, readings = self.run_with_clock(
+            lambda: 20., 0., lambda tick: 1000 if tick < 5000 else 10000)
+        self.assertLessEqual(overshoot, 10 * game_agent.Deadline.CHECK_PERIOD_NS)
+
+    def test_slow_nodes(self):
+        # nodes slower than the check period are checked one by one
+        deadline = game_agent.Deadline(lambda: 5.)
+        self.run_until_timeout(deadline, 0.001)
+        self.assertEqual(deadline.interval, 1)
+
+    def test_nodes(self):
+        deadline = game_agent.Deadline(lambda: float("inf"))
+        for _ in range(12345):
+            deadline.tick()
+        self.assertEqual(deadline.nodes, 12345)
+        deadline = game_agent.Deadline(lambda: 5.)
+        # the tick that times out is counted
+        self.assertEqual(self.run_until_timeout(deadline) + 1, deadline.nodes)
+
+    def test_expired(self):
+        deadline = game_agent.Deadline(lambda: 5., 10.)
+        self.assertEqual(self.run_until_timeout(deadline), 0)
+
+    def test_stop(self):
+        import threading
+        stop = threading.Event()
+        deadline = game_agent.Deadline(lambda: float("inf"), 10., stop)
+        self.assertIsNone(deadline.end)
+        for _ in range(10000):
+            deadline.tick()
+        stop.set()
+        self.assertLessEqual(self.run_until_timeout(deadline), game_agent.Deadline.MAX_INTERVAL)
+
+
+class SearchKernelTest(unittest.TestCase):
+    """Check the raw state search kernel of game_agent against the boards"""
+
+    minimax_value = TranspositionTest.minimax_value
+
+    def random_positions(self, count, score_fn, player_class=AlphaBetaPlayer):
+        new_game = lambda: isolation.Board(player_class(score_fn=score_fn),
+                                           RandomPlayer(), shuffle=False)
+        for game in random_games(count, new_game, (3, 20), random.Random(13),
+                                 playable=True):
+            yield game.active_player, game
+
+    def test_raw_scores(self):
+        for score_fn, raw_score in game_agent._RAW_SCORES.items():
+            for player, game in self.random_positions(20, score_fn):
+                s = game_agent._Search(game, player, None, 1)
+                blocked, own, opp = game_agent._raw_state(game)
+                self.assertEqual(raw_score(s, blocked, own, opp),
+                                 score_fn(game, player))
+                self.assertEqual(raw_score(s, blocked, opp, own),
+                                 score_fn(game, game.inactive_player))
+
+    def test_minimax_values(self):
+        for player, game in self.random_positions(10, improved_score, MinimaxPlayer):
+            player.time_left = lambda: 1000.
+            move = player.minimax(game, 3)
+            best = max(self.minimax_value(game.forecast_move(m), 2, player, improved_score)
+                       for m in game.get_legal_moves())
+            self.assertEqual(self.minimax_value(game.forecast_move(move), 2,
+                                                player, improved_score), best)
+
+    def test_bitboard_root(self):
+        for player, game in self.random_positions(5, custom_score_3):
+            bitboard = isolation.BitBoard(player, RandomPlayer())
+            bitboard._set_state(game._blocked_mask(), game._p1_loc, game._p2_loc,
+                                game.move_count, game.zobrist)
+            self.assertEqual(bitboard.to_string(), game.to_string())
+            player.time_left = lambda: 1000.
+            player.alphabeta(game, 4)
+            score = player.root_score
+            player.tt.clear()
+            player.alphabeta(bitboard, 4)
+            self.assertEqual(player.root_score, score)
+
+
+class SolvedSearchTest(unittest.TestCase):
+    """Check the scoring of game ends by distance and the end of iterative
+    deepening once the game is solved"""
+
+    def exact_value(self, game, player):
+        moves = game.get_legal_moves()
+        if not moves:
+            end = game_agent.WIN_SCORE - game.move_count
+            return -end if game.active_player is player else end
+        values = [self.exact_value(game.forecast_move(m), player) for m in moves]
+        return max(values) if game.active_player is player else min(values)
+
+    def late_positions(self, count):
+        new_game = lambda: isolation.Board(
+            AlphaBetaPlayer(score_fn=improved_score, solve_endgames=False),
+            RandomPlayer(), 5, 5, shuffle=False)
+        for game in random_games(count, new_game, (10, 10), random.Random(11),
+                                 playable=True):
+            yield game.active_player, game
+
+    def test_exact_values(self):
+        for player, game in self.late_positions(10):
+            player.time_left = lambda: 1000.
+            depth = len(game.get_blank_spaces())
+            move = player.alphabeta(game, depth)
+            self.assertTrue(player.solved())
+            self.assertEqual(player.root_score, self.exact_value(game, player))
+            self.assertEqual(self.exact_value(game.forecast_move(move), player),
+                             player.root_score)
+
+    def test_get_move_returns_early(self):
+        for player, game in self.late_positions(5):
+            start = timeit.default_timer()
+            time_left = lambda: 5000. - 1000 * (timeit.default_timer() - start)
+            move = player.get_move(game, time_left)
+            self.assertLess(timeit.default_timer() - start, 1.)
+            self.assertTrue(player.solved())
+            self.assertLessEqual(player.completed_depth, len(game.get_blank_spaces()))
+            self.assertEqual(self.exact_value(game.forecast_move(move), player),
+                             self.exact_value(game, player))
+
+
+class MCTSTest(unittest.TestCase):
+    """Check the Monte Carlo tree search player"""
+
+    exact_value = SolvedSearchTest.exact_value
+
+    def timer(self, seconds):
+        deadline = timeit.default_timer() + seconds
+        return lambda: 1000 * (deadline - timeit.default_timer())
+
+    def test_get_move(self):
+        for playout in ("random", "mobility"):
+            player = game_agent.MCTSPlayer(playout=playout, seed=0)
+            game = isolation.Board(player, RandomPlayer())
+            game.apply_move((3, 3))
+            game.apply_move((2, 2))
+            time_left = self.timer(0.1)
+            move = player.get_move(game, time_left)
+            self.assertGreater(time_left(), 0)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertGreater(player.playouts, 10)
+            self.assertGreater(player.playouts_per_second, 0)
+        self.assertRaises(ValueError, game_agent.MCTSPlayer, playout="greedy")
+
+    def test_tree_reuse(self):
+        player = game_agent.MCTSPlayer(seed=0)
+        game = isolation.Board(player, RandomPlayer(), shuffle=False)
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        game.apply_move(player.get_move(game, self.timer(0.1)))
+        game.apply_move(game.get_legal_moves()[0])
+        root = player._start_search(game)
+        self.assertGreater(player._visits[root], 0)
+        # a position of another game starts a new tree
+        game = isolation.Board(player, RandomPlayer(), shuffle=False)
+        game.apply_move((0, 0))
+        game.apply_move((6, 6))
+        self.assertEqual(player._start_search(game), 0)
+        self.assertEqual(len(player._visits), 1)
+
+    def test_finds_wins(self):
+        for player, game in SolvedSearchTest.late_positions(self, 10):
+            player = game_agent.MCTSPlayer(seed=1)
+            game = game.with_players(player, game.inactive_player)
+            if self.exact_value(game, player) < 0:
+                continue
+            move = player.get_move(game, self.timer(0.2))
+            self.assertGreater(self.exact_value(game.forecast_move(move), player), 0)
+
+
+class MobilityTest(unittest.TestCase):
+    """Check the mobility counts of the boards"""
+
+    def check_mobility(self, game):
+        for player in (game.active_player, game.inactive_player):
+            self.assertEqual(game.mobility(player), len(game.get_legal_moves(player)))
+        self.assertEqual(game.mobility(), len(game.get_legal_moves()))
+
+    def test_random_games(self):
+        rng = random.Random(17)
+        for kwargs in ({}, {"track_mobility": True}):
+            for _ in range(20):
+                game = isolation.Board("Player1", "Player2", shuffle=False, **kwargs)
+                undos = []
+                while True:
+                    self.check_mobility(game)
+                    moves = game.get_legal_moves()
+                    if not moves:
+                        break
+                    undos.append(game.apply_move(rng.choice(moves)))
+                copy = game.copy()
+                while undos:
+                    game.undo_move(undos.pop())
+                    self.check_mobility(game)
+                self.check_mobility(copy)
+                self.assertTrue(copy.is_loser(copy.active_player))
+                self.assertTrue(copy.is_winner(copy.inactive_player))
+
+    def test_symmetric(self):
+        game = isolation.Board("Player1", "Player2", track_mobility=True)
+        for move in ((2, 3), (0, 5), (4, 4), (2, 4)):
+            game.apply_move(move)
+        for transform in range(len(isolation.symmetries(7, 7))):
+            self.check_mobility(game.symmetric(transform))
+
+    def test_bitboard(self):
+        rng = random.Random(19)
+        for _ in range(20):
+            game = isolation.BitBoard("Player1", "Player2")
+            while game.get_legal_moves():
+                self.check_mobility(game)
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            self.check_mobility(game)
+
+
+class BitBoardTest(unittest.TestCase):
+    """Check that BitBoard agrees with Board on random games"""
+
+    def test_random_games(self):
+        for width, height in [(7, 7), (5, 8)]:
+            for _ in range(20):
+                board = isolation.Board("Player1", "Player2", width, height)
+                bitboard = isolation.BitBoard("Player1", "Player2", width, height)
+                while True:
+                    for player in ("Player1", "Player2"):
+                        self.assertEqual(sorted(board.get_legal_moves(player)),
+                                         sorted(bitboard.get_legal_moves(player)))
+                        self.assertEqual(board.get_player_location(player),
+                                         bitboard.get_player_location(player))
+                        self.assertEqual(board.utility(player),
+                                         bitboard.utility(player))
+                    self.assertEqual(board.to_string(), bitboard.to_string())
+                    self.assertEqual(board.zobrist, bitboard.zobrist)
+                    moves = board.get_legal_moves()
+                    if not moves:
+                        break
+                    move = random.choice(moves)
+                    self.assertTrue(bitboard.move_is_legal(move))
+                    board.apply_move(move)
+                    bitboard = bitboard.forecast_move(move)
+
+    def test_play(self):
+        game = isolation.BitBoard(RandomPlayer(), RandomPlayer())
+        winner, history, outcome = game.play()
+        self.assertEqual(outcome, "illegal move")
+        self.assertEqual(winner, game.inactive_player)
+        self.assertEqual(game.move_count, len(history))
+
+
+@unittest.skipIf(numpy is None, "BoardBatch requires numpy")
+class BoardBatchTest(unittest.TestCase):
+    """Check BoardBatch against Board on random positions"""
+
+    def random_boards(self, count, width=7, height=7):
+        new_game = lambda: isolation.Board("Player1", "Player2", width, height)
+        return list(random_games(count, new_game, (0, width * height)))
 
+    def test_matches_board(self):
+        boards = self.random_boards(200, 6, 7)
+        batch = isolation.BoardBatch.from_boards(boards)
+        for p, player in enumerate(("Player1", "Player2")):
+            mobility = batch.mobility(p)
+            masks = batch.legal_moves_mask(p)
+            utility = batch.utility(p)
+            for i, game in enumerate(boards):
+                moves = game.get_legal_moves(player)
+                self.assertEqual(mobility[i], len(moves))
+                self.assertEqual(set(numpy.flatnonzero(masks[i])),
+                                 {r + c * game.height for r, c in moves})
+                self.assertEqual(utility[i], game.utility(player))
+        for i, game in enumerate(batch.to_boards("Player1", "Player2")):
+            self.assertTrue(game.same_state(boards[i]))
 
+    def test_apply_moves(self):
+        boards = [game for game in self.random_boards(100) if game.get_legal_moves()]
+        batch = isolation.BoardBatch.from_boards(boards)
+        moves = [random.choice(game.get_legal_moves()) for game in boards]
+        batch.apply_moves([r + c * 7 for r, c in moves])
+        for game, move in zip(boards, moves):
+            game.apply_move(move)
+        self.assertEqual(list(batch.is_terminal()),
+                         [not game.get_legal_moves() for game in boards])
+        for i, game in enumerate(batch.to_boards("Player1", "Player2", isolation.BitBoard)):
+            self.assertEqual(game.zobrist, boards[i].zobrist)
 
+    def test_batch_heuristics(self):
+        from isolation.batch import improved_score as improved_score_batch
+        boards = [game for game in self.random_boards(100) if game.move_count >= 2]
+        batch = isolation.BoardBatch.from_boards(boards)
+        for p, player in enumerate(("Player1", "Player2")):
+            improved = improved_score_batch(batch, p)
+            custom = game_agent.custom_score_3_batch(batch, p)
+            for i, game in enumerate(boards):
+                self.assertEqual(improved[i], improved_score(game, player))
+                self.assertEqual(custom[i], custom_score_3(game, player))
 
 
 if __name__ == '__main__':
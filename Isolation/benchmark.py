@@ -0,0 +1,84 @@
+"""Measure how the cost of the core board operations grows with the size of
+the board, to check that large variants (e.g., 15x15 or 25x25) stay cheap
+per move.
+
+For each board size, random games are played and every operation is timed
+at every ply, so the reported figures are averages over whole games. All
+times are in microseconds per call.
+"""
+import argparse
+import random
+import timeit
+
+from isolation import Board, BitBoard
+
+SIZES = (7, 15, 25)   # board widths (and heights) to measure
+NUM_GAMES = 20        # number of random games played per board size
+REPEATS = 20          # number of calls timed per operation and ply
+
+OPERATIONS = ("first_move", "legal_moves", "apply_undo", "copy",
+              "blank_spaces", "to_string")
+
+
+def time_call(fn, repeats=REPEATS):
+    """Return the mean time of `repeats` calls of `fn()` in microseconds. """
+    start = timeit.default_timer()
+    for _ in range(repeats):
+        fn()
+    return (timeit.default_timer() - start) * 1e6 / repeats
+
+
+def measure(board_class, size, num_games=NUM_GAMES, seed=0):
+    """Play random games on a size x size board and return the mean time per
+    call of each operation in OPERATIONS, and the mean game length.
+    """
+    rng = random.Random(seed)
+    totals = dict((op, [0., 0]) for op in OPERATIONS)
+    plies = 0
+
+    def record(op, elapsed):
+        totals[op][0] += elapsed
+        totals[op][1] += 1
+
+    for _ in range(num_games):
+        game = board_class("1", "2", size, size, shuffle=False)
+        record("first_move", time_call(game.get_legal_moves))
+        while True:
+            record("legal_moves", time_call(game.get_legal_moves))
+            record("copy", time_call(game.copy))
+            record("blank_spaces", time_call(game.get_blank_spaces))
+            record("to_string", time_call(game.to_string))
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            move = rng.choice(moves)
+            record("apply_undo", time_call(lambda: game.undo_move(game.apply_move(move))))
+            game.apply_move(move)
+            plies += 1
+
+    means = dict((op, total / max(1, count)) for op, (total, count) in totals.items())
+    return means, plies / float(num_games)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                        help="board widths (and heights) to measure")
+    parser.add_argument("--games", type=int, default=NUM_GAMES,
+                        help="number of random games per board size")
+    args = parser.parse_args()
+
+    header = "{:<10}{:>6}{:>7}".format("Board", "Size", "Plies") + \
+        "".join("{:>14}".format(op) for op in OPERATIONS)
+    print(header)
+    print("-" * len(header))
+    for board_class in (Board, BitBoard):
+        for size in args.sizes:
+            means, plies = measure(board_class, size, args.games)
+            print("{:<10}{:>6}{:>7.1f}".format(board_class.__name__,
+                                               "{0}x{0}".format(size), plies) +
+                  "".join("{:>14.2f}".format(means[op]) for op in OPERATIONS))
+
+
+if __name__ == "__main__":
+    main()
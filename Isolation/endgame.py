@@ -0,0 +1,185 @@
+"""Exact endgame solver for partitioned Isolation positions.
+
+Once the players can no longer reach any common cell (see
+`isolation.Board.is_partitioned`), each player moves independently in their
+own region and the game is decided by the longest knight path that each
+player can make: the player to move wins if and only if their longest path
+is strictly longer than their opponent's.
+
+Longest paths are found with a depth-first search memoized on (reachable
+region bitmask, location) and pruned with an upper bound on the path length
+in the region.
+"""
+from collections import namedtuple
+
+from isolation import knight_reach, knight_shifts
+from isolation.bitboard import knight_tables
+
+# Number of search nodes between two checks of the timer
+CHECK_INTERVAL = 256
+
+
+class _Timeout(Exception):
+    """Raised internally when the solver runs out of time. """
+    pass
+
+
+class EndgameResult(namedtuple("EndgameResult", ["active_length", "inactive_length", "best_move"])):
+    """Exact result of a partitioned position.
+
+    Attributes
+    ----------
+    active_length : int
+        The longest path available to the player to move.
+
+    inactive_length : int
+        The longest path available to the player in waiting.
+
+    best_move : (int, int)
+        The first move of a longest path for the player to move, or
+        (-1, -1) if the player to move has no legal moves.
+    """
+    __slots__ = ()
+
+    @property
+    def active_wins(self):
+        """True if the player to move wins with best play. """
+        return self.active_length > self.inactive_length
+
+
+def _color_masks(width, height):
+    """Return the bitmasks of the cells with (row + column) even and odd. """
+    even = 0
+    for c in range(width):
+        for r in range(height):
+            if not (r + c) & 1:
+                even |= 1 << (r + c * height)
+    return even, ((1 << (width * height)) - 1) & ~even
+
+
+def _popcount(mask):
+    return bin(mask).count("1")
+
+
+def solve(game, time_left=None, threshold=0., memo=None):
+    """Solve a partitioned position exactly.
+
+    Parameters
+    ----------
+    game : isolation.Board
+        A position in which `game.is_partitioned()` is True.
+
+    time_left : callable (optional)
+        A function that returns the number of milliseconds left in the
+        current turn. If None, the search is not time limited.
+
+    threshold : float (optional)
+        The search gives up when `time_left()` drops below this value.
+
+    memo : dict (optional)
+        A table of longest path lengths keyed by (region, location), which
+        can be shared between calls on boards of the same size.
+
+    Returns
+    -------
+    EndgameResult or None
+        The exact result, or None if the position is not partitioned or if
+        the time ran out.
+    """
+    if not game.is_partitioned():
+        return None
+
+    width, height = game.width, game.height
+    masks = knight_tables(width, height)[0]
+    shifts = knight_shifts(width, height)
+    even, odd = _color_masks(width, height)
+    open_mask = 0
+    for r, c in game.get_blank_spaces():
+        open_mask |= 1 << (r + c * height)
+    if memo is None:
+        memo = {}
+    nodes = [0]
+
+    def longest(loc, region):
+        """Return the longest path from `loc` through the cells of `region`
+        (which must be the cells reachable from `loc`).
+        """
+        key = (region, loc)
+        if key in memo:
+            return memo[key]
+
+        nodes[0] += 1
+        if time_left is not None and not nodes[0] % CHECK_INTERVAL:
+            if time_left() < threshold:
+                raise _Timeout()
+
+        moves = masks[loc] & region
+        if not moves:
+            return 0
+
+        # Knight moves alternate colors, so a path from `loc` cannot use
+        # more than one cell of the color of `loc` per cell of the other
+        # color. A path can also end in at most one cell that has a single
+        # neighbor left, so every other dead end is out of reach.
+        if (even >> loc) & 1:
+            same, other = _popcount(region & even), _popcount(region & odd)
+        else:
+            same, other = _popcount(region & odd), _popcount(region & even)
+        bound = min(2 * other, 2 * same + 1)
+        dead_ends = 0
+        cells = region
+        reachable = region | (1 << loc)
+        while cells:
+            low = cells & -cells
+            cells ^= low
+            neighbors = masks[low.bit_length() - 1] & reachable
+            if not neighbors & (neighbors - 1):
+                dead_ends += 1
+        bound = min(bound, _popcount(region) - max(0, dead_ends - 1))
+
+        # Try the moves with the fewest onward moves first (Warnsdorff's
+        # rule), which tends to find a path that meets the bound early.
+        children = []
+        while moves:
+            low = moves & -moves
+            moves ^= low
+            nxt = low.bit_length() - 1
+            children.append((_popcount(masks[nxt] & region), nxt, low))
+        children.sort()
+
+        best = 0
+        for _, nxt, low in children:
+            length = 1 + longest(nxt, knight_reach(low, region ^ low, shifts))
+            if length > best:
+                best = length
+                if best >= bound:
+                    break
+        memo[key] = best
+        return best
+
+    def region_of(loc):
+        return knight_reach(1 << loc, open_mask, shifts)
+
+    active = game.get_player_location(game.active_player)
+    inactive = game.get_player_location(game.inactive_player)
+    active_idx = active[0] + active[1] * height
+    inactive_idx = inactive[0] + inactive[1] * height
+
+    try:
+        inactive_length = longest(inactive_idx, region_of(inactive_idx))
+        region = region_of(active_idx)
+        best_move = (-1, -1)
+        active_length = 0
+        moves = masks[active_idx] & open_mask
+        while moves:
+            low = moves & -moves
+            moves ^= low
+            nxt = low.bit_length() - 1
+            length = 1 + longest(nxt, knight_reach(low, region ^ low, shifts))
+            if length > active_length:
+                active_length = length
+                best_move = (nxt % height, nxt // height)
+    except _Timeout:
+        return None
+
+    return EndgameResult(active_length, inactive_length, best_move)
@@ -0,0 +1,106 @@
+"""Bounded cache of the scores of evaluated positions.
+
+A search scores many of the leaves already scored by the search at the
+previous move of the same player, whose deeper iterations reached the same
+plies of the game. An `EvalCache` remembers the score of each position
+under its 64-bit key (the Zobrist key of the position combined with the
+side of the scoring player, see `game_agent.CachedScore`), so that each of
+them is only scored once.
+
+The number of entries never exceeds the capacity given to the constructor.
+Once the cache is full, an entry is evicted for each new one with the
+clock algorithm, an approximation of least-recently-used eviction: a hand
+sweeps over the entries, clearing the mark set on an entry each time it is
+found by `probe`, and evicts the first entry that is not marked. Positions
+that are never found again are evicted first, and positions that keep
+being found stay in the cache.
+
+The keys, scores and marks are stored in flat arrays, with a dict from key
+to array slot; each entry takes about 130 bytes.
+"""
+from array import array
+
+
+class EvalCache(object):
+    """A fixed-size table of scores keyed by 64-bit keys.
+
+    Parameters
+    ----------
+    max_entries : int
+        The maximum number of entries held by the cache.
+
+    Attributes
+    ----------
+    hits : int
+        The number of calls to `probe` that found their key.
+
+    misses : int
+        The number of calls to `probe` that did not find their key.
+    """
+
+    def __init__(self, max_entries):
+        self._size = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def capacity(self):
+        """The number of entries the cache can hold. """
+        return self._size
+
+    @property
+    def hit_rate(self):
+        """The fraction of the calls to `probe` that found their key (0 if
+        `probe` was never called).
+        """
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.
+
+    def clear(self):
+        """Remove every entry from the cache (the counters are kept). """
+        size = self._size
+        self._slots = {}
+        self._keys = array('Q', bytes(8 * size))
+        self._values = array('d', bytes(8 * size))
+        # Set when an entry is found, cleared when the hand passes it
+        self._marks = bytearray(size)
+        self._hand = 0
+
+    def probe(self, key):
+        """Return the score stored for `key`, or None. """
+        slot = self._slots.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._marks[slot] = 1
+        return self._values[slot]
+
+    def store(self, key, value):
+        """Store the score `value` of the position with key `key`, evicting
+        an entry if the cache is full.
+        """
+        slots = self._slots
+        slot = slots.get(key)
+        if slot is None:
+            if len(slots) < self._size:
+                slot = len(slots)
+            else:
+                marks = self._marks
+                hand = self._hand
+                while marks[hand]:
+                    marks[hand] = 0
+                    hand = (hand + 1) % self._size
+                slot = hand
+                self._hand = (hand + 1) % self._size
+                del slots[self._keys[slot]]
+            slots[key] = slot
+            self._keys[slot] = key
+            # New entries are not marked: a leaf that is never found again
+            # is evicted on the next pass of the hand
+            self._marks[slot] = 0
+        self._values[slot] = value
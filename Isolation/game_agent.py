@@ -4,12 +4,128 @@ and include the results in your report.
 """
 import random
 import math
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+import multiprocessing
+import os
+import time
+
+import endgame
+from isolation import BitBoard, knight_neighbors, zobrist_keys
+from isolation.bitboard import knight_tables
+from evalcache import EvalCache
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Score of a won game, from which the number of moves played is taken off
+# (so that the search prefers the fastest win and the longest loss); the
+# score functions must stay below WIN_SCORE / 2 in absolute value.
+WIN_SCORE = 1e6
+
+# Width of the null windows of principal variation search: wider than the
+# spacing of floats up to WIN_SCORE, and narrower than the difference
+# between two distinct scores of the score functions.
+_NULL_WINDOW = 1e-9
+
+
+def _clock_ns():
+    """Return the value of the performance counter in integer nanoseconds
+    (time.perf_counter_ns() is not available before Python 3.7).
+    """
+    return int(time.perf_counter() * 1e9)
+
 
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
     pass
 
 
+class Deadline(object):
+    """Absolute deadline of a search, checked every few search nodes.
+
+    Reading the clock costs a sizable fraction of a search node, so the
+    clock is only read every `interval` calls to `tick()`. The interval is
+    adjusted at each reading from the measured time per node (growing at
+    most twofold per reading), so that the clock is read about every
+    CHECK_PERIOD_NS nanoseconds, which bounds how far a search can overrun
+    the deadline.
+
+    Parameters
+    ----------
+    time_left : callable
+        A function that returns the number of milliseconds left in the
+        current turn. It is only called once, to set the deadline.
+
+    threshold : float (optional)
+        The deadline is reached when `time_left()` would drop below this
+        number of milliseconds.
+
+    stop : threading.Event (optional)
+        If given, the deadline is also reached once the event is set.
+    """
+
+    # Target time between two readings of the clock (nanoseconds)
+    CHECK_PERIOD_NS = 200000
+
+    # Maximum number of nodes between two readings of the clock
+    MAX_INTERVAL = 4096
+
+    __slots__ = ('end', 'stop', 'interval', 'countdown', '_last_ns',
+                 '_counted', '_batch')
+
+    def __init__(self, time_left, threshold=0., stop=None):
+        now = _clock_ns()
+        remaining = time_left() - threshold
+        # There is no end to searches with unlimited time (e.g., pondering)
+        if remaining == float("inf"):
+            self.end = None
+        else:
+            self.end = now + int(max(remaining, -1e9) * 1e6)
+        self.stop = stop
+        # No node has been timed before the first reading
+        self.interval = 0
+        self.countdown = 1
+        self._last_ns = now
+        # Nodes counted at the last reading, and the countdown it started
+        self._counted = 0
+        self._batch = 1
+
+    @property
+    def nodes(self):
+        """The number of calls to `tick()` so far. """
+        return self._counted + self._batch - self.countdown
+
+    def tick(self):
+        """Count one search node and raise SearchTimeout if the deadline has
+        been reached (as of the last reading of the clock).
+        """
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.check()
+
+    def check(self):
+        """Read the clock, raise SearchTimeout if the deadline has been
+        reached, and adjust the number of nodes until the next reading.
+        """
+        now = _clock_ns()
+        self._counted += self._batch - self.countdown
+        self._batch = self.countdown
+        if ((self.end is not None and now >= self.end) or
+                (self.stop is not None and self.stop.is_set())):
+            raise SearchTimeout()
+        if self.interval:
+            per_node = max(1, (now - self._last_ns) // self.interval)
+            period = self.CHECK_PERIOD_NS
+            if self.end is not None:
+                period = min(period, (self.end - now) // 2)
+            self.interval = max(1, min(self.MAX_INTERVAL, 2 * self.interval,
+                                       period // per_node))
+        else:
+            self.interval = 1
+        self.countdown = self._batch = self.interval
+        self._last_ns = now
+
+
 """
 Evaluation functions are going to be created as a weighted combination of
 features that are dependent on the position of the players and the state 
@@ -44,15 +160,15 @@ Returns
 float
     The heuristic value of the current game state to the specified player.
 """
-# Precompute dictionaries for distance to center, difference in open moves and abs calculations
-rows_cols = [0, 1, 2, 3, 4, 5, 6]
-the_abs = {-6: 6, -5: 5, -4: 4, -3: 3, -2: 2, -1: 1, 0: 0, 1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6}
-dist2center= { r:{c:abs(3-r)+abs(3-c) for c in rows_cols} for r in rows_cols }
-open_move_diff = {i: {j: i - 2 * j for j in range(50)} for i in range(50)}
-inv_dist2center = {r: {c: 1 / (1 + (abs(3 - r) + abs(3 - c))) for c in rows_cols} for r in rows_cols}
-inv_dist2opp = {
-r: {c: 1 / (r + c) if r != 0 and c != 0 else 1 / c if c != 0  else 1 / r if r != 0 else 1 for c in rows_cols} for r in
-rows_cols}
+# Precomputed once per board size
+@lru_cache(maxsize=None)
+def dist2center(width, height):
+    """Return a table of the Manhattan distance from each cell of a board of
+    the given size to its center cell, indexed as `table[row][column]`.
+    """
+    cr, cc = height // 2, width // 2
+    return [[abs(cr - r) + abs(cc - c) for c in range(width)]
+            for r in range(height)]
 
 def custom_score(game, player):
     if game.is_loser(player):
@@ -64,7 +180,7 @@ def custom_score(game, player):
     # my distance to the opponent (closer is better - keep your enemies closer)
     my, mx = game.get_player_location(player)
     oy, ox = game.get_player_location(game.get_opponent(player))
-    return float(inv_dist2opp[the_abs[my - oy]][the_abs[mx - ox]])
+    return 1. / max(1, abs(my - oy) + abs(mx - ox))
 
 def custom_score_2(game, player):
     if game.is_loser(player):
@@ -76,7 +192,8 @@ def custom_score_2(game, player):
     # Difference between my opponents distance to the center and my distance
     myr, myc = game.get_player_location(player)
     opr, opc = game.get_player_location(game.get_opponent(player))
-    return float(dist2center[opr][opc] - dist2center[myr][myc])
+    table = dist2center(game.width, game.height)
+    return float(table[opr][opc] - table[myr][myc])
 
 def custom_score_3(game,player):
     if game.is_loser(player):
@@ -87,11 +204,528 @@ def custom_score_3(game,player):
 
     my, mx = game.get_player_location(player)
     oy, ox = game.get_player_location(game.get_opponent(player))
-    mom = len(game.get_legal_moves(player))
-    oom = len(game.get_legal_moves(game.get_opponent(player)))
+    mom = game.mobility(player)
+    oom = game.mobility(game.get_opponent(player))
 
     # push opponent away from center and away from me while I have more open moves
-    return float(mom - oom + dist2center[oy][ox] - dist2center[my][mx] + (the_abs[my - oy] + the_abs[mx - ox]))
+    table = dist2center(game.width, game.height)
+    return float(mom - oom + table[oy][ox] - table[my][mx] + (abs(my - oy) + abs(mx - ox)))
+
+def custom_score_3_batch(batch, player):
+    """Vectorized version of `custom_score_3` that scores every position of
+    an `isolation.BoardBatch` at once.
+
+    Parameters
+    ----------
+    batch : `isolation.BoardBatch`
+        The positions to evaluate (both players must have moved).
+
+    player : int
+        The index of the player to evaluate for (0 for player 1, 1 for
+        player 2).
+
+    Returns
+    -------
+    numpy.ndarray
+        An (N,) float array with the heuristic value of each position.
+    """
+    mloc = batch.locations[:, player]
+    oloc = batch.locations[:, 1 - player]
+    my, mx = mloc % batch.height, mloc // batch.height
+    oy, ox = oloc % batch.height, oloc // batch.height
+    cy, cx = batch.height // 2, batch.width // 2
+    mom = batch.mobility(player)
+    oom = batch.mobility(1 - player)
+
+    scores = (mom - oom + abs(cy - oy) + abs(cx - ox) - abs(cy - my) - abs(cx - mx) +
+              abs(my - oy) + abs(mx - ox)).astype(float)
+    utility = batch.utility(player)
+    over = utility != 0
+    scores[over] = utility[over]
+    return scores
+
+
+def _custom_score_raw(s, blocked, mine, theirs):
+    """Version of `custom_score` for the raw states of the search kernel
+    (see `_Search`), given the cell indices of the player and opponent.
+    """
+    my, mx = s.cells[mine]
+    oy, ox = s.cells[theirs]
+    return 1. / max(1, abs(my - oy) + abs(mx - ox))
+
+
+def _custom_score_2_raw(s, blocked, mine, theirs):
+    """Version of `custom_score_2` for the raw states of the search kernel. """
+    return float(s.center[theirs] - s.center[mine])
+
+
+def _custom_score_3_raw(s, blocked, mine, theirs):
+    """Version of `custom_score_3` for the raw states of the search kernel. """
+    my, mx = s.cells[mine]
+    oy, ox = s.cells[theirs]
+    mom = bin(s.masks[mine] & ~blocked).count("1")
+    oom = bin(s.masks[theirs] & ~blocked).count("1")
+    return float(mom - oom + s.center[theirs] - s.center[mine] +
+                 (abs(my - oy) + abs(mx - ox)))
+
+
+# Versions of the score functions above for the raw states of the search
+# kernel, which score the leaves without loading them into a board
+_RAW_SCORES = {custom_score: _custom_score_raw,
+               custom_score_2: _custom_score_2_raw,
+               custom_score_3: _custom_score_3_raw}
+
+
+class CachedScore(object):
+    """Score function that remembers the scores of the positions it has
+    evaluated in a bounded `EvalCache`. The search kernel probes the cache
+    before loading a leaf into a board.
+
+    Every move blocks a cell, so the leaves of an iteration are never
+    leaves of the next one; the hits come from the searches at later
+    moves, most of which the transposition table of `AlphaBetaPlayer`
+    already catches. The cache pays off for expensive score functions and
+    for players without a transposition table.
+
+    Positions are keyed by their Zobrist key combined with the side of the
+    scoring player (see `AlphaBetaPlayer.SIDE_KEY`), so a single
+    `CachedScore` can be shared by any number of players and games on
+    boards of the same size.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The score function to cache (such as `custom_score_3`).
+
+    max_entries : int (optional)
+        The maximum number of scores held by the cache, which bounds its
+        memory use (about 130 bytes per entry).
+    """
+
+    CACHE_SIZE = 2 ** 16
+
+    def __init__(self, score_fn, max_entries=CACHE_SIZE):
+        self.score_fn = score_fn
+        self.cache = EvalCache(max_entries)
+
+    def __call__(self, game, player):
+        second = (player == game.active_player) == bool(game.move_count & 1)
+        key = game.zobrist ^ (AlphaBetaPlayer.SIDE_KEY if second else 0)
+        score = self.cache.probe(key)
+        if score is None:
+            score = self.score_fn(game, player)
+            self.cache.store(key, score)
+        return score
+
+    # Copies sent to worker processes start with an empty cache, and
+    # compare equal to the original so that the workers keep a single
+    # search player per settings (see `_search_root_move()`).
+    def __reduce__(self):
+        return CachedScore, (self.score_fn, self.cache.capacity)
+
+    def __eq__(self, other):
+        return (isinstance(other, CachedScore) and
+                (self.score_fn, self.cache.capacity) ==
+                (other.score_fn, other.cache.capacity))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.score_fn, self.cache.capacity))
+
+
+# Shared by every search on a board of the same size
+@lru_cache(maxsize=None)
+def _kernel_tables(width, height):
+    """Return the tables used by `_negamax()` and `_alphabeta()` on a board
+    of the given size: the (bit, index) pairs of the knight neighbors, the
+    knight-attack mask, the (row, column) coordinates and the distance to
+    the center (see `dist2center()`) of every cell, the mask of all the
+    cells, and for each player (1 and 2) the Zobrist key of every location
+    and the keys to xor in when the player moves to each cell (blocked
+    cell, location and initiative).
+    """
+    masks, _, cells, full_mask = knight_tables(width, height)
+    # Neighbors in cell order, as generated by `BitBoard`
+    neighbors = tuple(tuple((1 << idx, idx) for idx, _ in sorted(cell_neighbors))
+                      for cell_neighbors in knight_neighbors(width, height))
+    table = dist2center(width, height)
+    center = tuple(table[r][c] for r, c in cells)
+    cell_keys, player_keys, initiative_key = zobrist_keys(width, height)
+    move_keys = tuple(tuple(c ^ k ^ initiative_key
+                            for c, k in zip(cell_keys, location_keys))
+                      for location_keys in player_keys)
+    return (neighbors, masks, cells, center, full_mask, player_keys, move_keys)
+
+
+def _raw_state(game):
+    """Return the raw state of a board (see `_Search`): the mask of the
+    blocked cells and the cell indices of the player to move and of its
+    opponent (-1 for a player that has not moved).
+    """
+    height = game.height
+    blocked = (1 << (game.width * height)) - 1
+    for r, c in game.get_blank_spaces():
+        blocked ^= 1 << (r + c * height)
+    locations = []
+    for p in (game.active_player, game.inactive_player):
+        loc = game.get_player_location(p)
+        locations.append(-1 if loc is None else loc[0] + loc[1] * height)
+    return blocked, locations[0], locations[1]
+
+
+class _Search(object):
+    """Tables and settings shared by the nodes of a search.
+
+    The search kernel (`_negamax()` and `_alphabeta()`) runs on raw states
+    rather than on boards: the bitmask of the blocked cells, the cell index
+    of the player to move and of its opponent (-1 for a player that has not
+    moved), the move count and the Zobrist key of the position. Scores are
+    relative to the player to move (negamax). Leaves are loaded into a
+    single scratch `BitBoard` to be scored by the score function of
+    `player`, which must be the player to move at the root, unless the
+    score function has a raw state version in `_RAW_SCORES`. If the score
+    function is a `CachedScore`, its cache is probed first.
+    """
+
+    __slots__ = ('neighbors', 'masks', 'cells', 'center', 'height',
+                 'full_mask', 'player_keys', 'move_keys', 'tick', 'depth',
+                 'tt', 'side', 'ordering', 'pvs', 'killers', 'history',
+                 'leaves', 'expanded', 'cutoffs', 'first_cutoffs',
+                 '_leaf', '_player', '_score_fn', '_raw_score', '_parity',
+                 '_cache', '_cache_side')
+
+    def __init__(self, game, player, tick, depth):
+        (self.neighbors, self.masks, self.cells, self.center,
+         self.full_mask, self.player_keys,
+         self.move_keys) = _kernel_tables(game.width, game.height)
+        self.height = game.height
+        self.tick = tick
+        self.depth = depth
+        self.tt = None
+        self.side = 0
+        self.ordering = False
+        self.pvs = False
+        self.killers = []
+        self.history = defaultdict(int)
+        # Counters of the search (see `searchstats.MoveStats`)
+        self.leaves = 0
+        self.expanded = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        if game.move_count & 1:
+            players = (game.inactive_player, game.active_player)
+        else:
+            players = (game.active_player, game.inactive_player)
+        self._leaf = BitBoard(players[0], players[1], game.width, game.height)
+        self._player = player
+        score_fn = player.score
+        self._cache = None
+        if isinstance(score_fn, CachedScore):
+            self._cache = score_fn.cache
+            score_fn = score_fn.score_fn
+        self._score_fn = score_fn
+        self._raw_score = _RAW_SCORES.get(score_fn)
+        self._parity = game.move_count & 1
+        self._cache_side = AlphaBetaPlayer.SIDE_KEY if self._parity else 0
+
+    def evaluate(self, blocked, own, opp, move_count, zobrist):
+        """Return the score of a raw state for the player to move. """
+        self.leaves += 1
+        mine = move_count & 1 == self._parity
+        cache = self._cache
+        if cache is not None:
+            key = zobrist ^ self._cache_side
+            score = cache.probe(key)
+            if score is not None:
+                return score if mine else -score
+        if self._raw_score is not None and own >= 0 and opp >= 0:
+            if mine:
+                score = self._raw_score(self, blocked, own, opp)
+            else:
+                score = self._raw_score(self, blocked, opp, own)
+        else:
+            if move_count & 1:
+                self._leaf._set_state(blocked, opp, own, move_count, zobrist)
+            else:
+                self._leaf._set_state(blocked, own, opp, move_count, zobrist)
+            score = self._score_fn(self._leaf, self._player)
+        if cache is not None:
+            cache.store(key, score)
+        return score if mine else -score
+
+
+def _negamax(s, blocked, own, opp, move_count, zobrist, d):
+    """Return the minimax value of a raw state (see `_Search`) searched to
+    depth `d`.
+    """
+    s.tick()
+    if own < 0:
+        moves = _mask_cells(s.full_mask & ~blocked)
+    else:
+        moves = [to for bit, to in s.neighbors[own] if not blocked & bit]
+    # The player to move cannot move: it loses after move_count moves
+    if not moves:
+        return move_count - WIN_SCORE
+    if d == 0:
+        return s.evaluate(blocked, own, opp, move_count, zobrist)
+
+    s.expanded += 1
+    seat = move_count & 1
+    if own >= 0:
+        zobrist ^= s.player_keys[seat][own]
+    move_keys = s.move_keys[seat]
+    v = float("-inf")
+    for to in moves:
+        score = -_negamax(s, blocked | (1 << to), opp, to, move_count + 1,
+                          zobrist ^ move_keys[to], d - 1)
+        if score > v:
+            v = score
+    return v
+
+
+def _negamax_root(s, blocked, own, opp, move_count, zobrist, d, moves):
+    """Return the move of `moves` (a list of (row, column) pairs) with the
+    best minimax value in a raw state (see `_Search`) searched to depth `d`,
+    the first one on ties.
+    """
+    seat = move_count & 1
+    if own >= 0:
+        zobrist ^= s.player_keys[seat][own]
+    move_keys = s.move_keys[seat]
+    best_move = moves[0]
+    v = float("-inf")
+    for m in moves:
+        to = m[0] + m[1] * s.height
+        score = -_negamax(s, blocked | (1 << to), opp, to, move_count + 1,
+                          zobrist ^ move_keys[to], d - 1)
+        if score > v:
+            v, best_move = score, m
+    return best_move
+
+
+def _alphabeta(s, blocked, own, opp, move_count, zobrist, d, alpha, beta):
+    """Return the alpha-beta value of a raw state (see `_Search`) searched
+    to depth `d` with the window (alpha, beta), using the transposition
+    table, move ordering and principal variation search settings of `s`.
+    """
+    s.tick()
+    if own < 0:
+        moves = _mask_cells(s.full_mask & ~blocked)
+    else:
+        moves = [to for bit, to in s.neighbors[own] if not blocked & bit]
+    # The player to move cannot move: it loses after move_count moves
+    if not moves:
+        return move_count - WIN_SCORE
+    if d == 0:
+        return s.evaluate(blocked, own, opp, move_count, zobrist)
+
+    tt = s.tt
+    key = zobrist ^ s.side
+    first = -1
+    if tt is not None:
+        entry = tt.probe(key)
+        if entry is not None:
+            if entry.depth >= d:
+                bound, value = entry.bound, entry.value
+                if (bound == EXACT or (bound == LOWER and value >= beta) or
+                        (bound == UPPER and value <= alpha)):
+                    return value
+            if entry.move is not None:
+                first = entry.move[0] + entry.move[1] * s.height
+
+    s.expanded += 1
+    seat = move_count & 1
+    if own >= 0:
+        zobrist ^= s.player_keys[seat][own]
+    move_keys = s.move_keys[seat]
+    pvs = s.pvs
+    alpha0 = alpha
+    v = float("-inf")
+    best = -1
+    for to in _ordered_moves(s, moves, first, d):
+        child = (s, blocked | (1 << to), opp, to, move_count + 1,
+                 zobrist ^ move_keys[to], d - 1)
+        if pvs and best >= 0:
+            score = -_alphabeta(*child, -(alpha + _NULL_WINDOW), -alpha)
+            if alpha < score < beta:
+                score = -_alphabeta(*child, -beta, -alpha)
+        else:
+            score = -_alphabeta(*child, -beta, -alpha)
+        if score > v:
+            v, best = score, to
+            if v >= beta:
+                _cutoff(s, to, d)
+                s.cutoffs += 1
+                if to == moves[0]:
+                    s.first_cutoffs += 1
+                break
+            if v > alpha:
+                alpha = v
+
+    if tt is not None:
+        if v <= alpha0:
+            tt.store(key, d, UPPER, v, s.cells[best])
+        elif v >= beta:
+            tt.store(key, d, LOWER, v, s.cells[best])
+        else:
+            tt.store(key, d, EXACT, v, s.cells[best])
+    return v
+
+
+def _ordered_moves(s, moves, first, d):
+    """Sort a list of moves (cell indices) in place, starting with `first`
+    (the stored best move, if any), then the killer moves of the ply, then
+    the other moves by decreasing history score, and return it.
+    """
+    if s.ordering:
+        moves.sort(key=s.history.__getitem__, reverse=True)
+        for m in reversed(s.killers[s.depth - d]):
+            if m in moves:
+                moves.remove(m)
+                moves.insert(0, m)
+    if first >= 0 and first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+    return moves
+
+
+def _score_cache(score_fn):
+    """Return the `EvalCache` of a score function, or None. """
+    return score_fn.cache if isinstance(score_fn, CachedScore) else None
+
+
+def _count_search(stats, s, deadline):
+    """Add the counters of a search of the kernel to a
+    `searchstats.SearchStats`.
+    """
+    stats.add_search(deadline.nodes, s.leaves, s.expanded, s.cutoffs,
+                     s.first_cutoffs)
+
+
+def _mask_cells(mask):
+    """Return the cell indices of the bits set in a mask. """
+    cells = []
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        cells.append(low.bit_length() - 1)
+    return cells
+
+
+def _cutoff(s, m, d):
+    """Remember that the move to cell `m` caused a cutoff `d` plies above
+    the search horizon.
+    """
+    if not s.ordering:
+        return
+    ply_killers = s.killers[s.depth - d]
+    if m not in ply_killers:
+        ply_killers.insert(0, m)
+        del ply_killers[2:]
+    s.history[m] += d * d
+
+
+# Stand-ins for the players of the positions sent to worker processes (see
+# `AlphaBetaPlayer.ponder` and `AlphaBetaPlayer.workers`), and the search
+# players of each worker process keyed by their settings.
+_ROOT_PLAYER = "root"
+_OTHER_PLAYER = "opponent"
+_WORKER_PLAYERS = {}
+
+# The entries of the pondering search shallower than this make up most of
+# its table and are cheap to search again, so they are not sent back.
+_PONDER_MIN_DEPTH = 2
+
+
+def _seats(game, player):
+    """Return the pair (player 1, player 2) of a position in which `player`
+    is to move and the opponent is `_OTHER_PLAYER`.
+    """
+    if game.move_count & 1:
+        return _OTHER_PLAYER, player
+    return player, _OTHER_PLAYER
+
+
+def _worker_player(settings, move_count):
+    """Return the search player of this worker process for `settings`,
+    with its move ordering state started over (and its table aged) when it
+    searches the positions of a new move count.
+    """
+    player = _WORKER_PLAYERS.get(settings)
+    if player is None:
+        score_fn, timeout, tt_size, move_ordering, pvs = settings
+        player = AlphaBetaPlayer(score_fn=score_fn, timeout=timeout,
+                                 tt_size=tt_size, move_ordering=move_ordering,
+                                 pvs=pvs)
+        player._last_root = None
+        _WORKER_PLAYERS[settings] = player
+    if player._last_root != move_count:
+        player._last_root = move_count
+        player._killers = []
+        player._history = defaultdict(int)
+        if player.tt is not None:
+            player.tt.new_search()
+    return player
+
+
+def _ponder_positions(positions, settings, stop):
+    """Search `positions` in the pondering process by iterative deepening,
+    round-robin, until `stop` is set or every position is solved. Return
+    the entries of at least _PONDER_MIN_DEPTH plies stored in the
+    transposition table (see `TranspositionTable.export`).
+    """
+    player = _worker_player(settings, positions[0].move_count)
+    player.time_left = lambda: float("inf")
+    player._stop = stop
+    positions = [p.with_players(*_seats(p, player)) for p in positions]
+    try:
+        depth = 1
+        while positions:
+            for position in list(positions):
+                player.alphabeta(position, depth)
+                if player.solved():
+                    positions.remove(position)
+            depth += 1
+    except SearchTimeout:
+        pass
+    finally:
+        player._stop = None
+    return player.tt.export(_PONDER_MIN_DEPTH)
+
+
+def _ponder_loop(conn, stop):
+    """Run the pondering process of a player: search each task received on
+    `conn` until `stop` is set, and send back its results. The process runs
+    at the lowest priority, so that it takes little processor time from the
+    players when they share a processor.
+    """
+    try:
+        os.nice(19)
+    except (AttributeError, OSError):
+        pass
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        positions, settings = task
+        conn.send(_ponder_positions(positions, settings, stop))
+
+
+def _search_root_move(task):
+    """Search a single root move in a worker process and return its score,
+    or None if the search ran out of time.
+    """
+    board, move, depth, alpha, deadline, settings = task
+    player = _worker_player(settings, board.move_count)
+    board = board.with_players(*_seats(board, player))
+    player.time_left = lambda: 1000 * (deadline - time.monotonic())
+    try:
+        player.alphabeta(board, depth, alpha, root_moves=[move])
+    except SearchTimeout:
+        return None
+    return player.root_score
 
 
 class IsolationPlayer:
@@ -128,8 +762,16 @@ class MinimaxPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
+
+    Attributes
+    ----------
+    stats : `searchstats.SearchStats`
+        If set, the statistics of the search of every move are recorded in
+        it (None by default).
     """
 
+    stats = None
+
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -159,6 +801,10 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        stats = self.stats
+        if stats is not None:
+            stats.start_move(game.move_count, cache=_score_cache(self.score))
+        depth = None
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -167,11 +813,16 @@ class MinimaxPlayer(IsolationPlayer):
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            depth = self.search_depth
+            if stats is not None:
+                stats.end_iteration()
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
+        if stats is not None:
+            stats.end_move(depth)
         # Return the best move from the last completed search iteration
         return best_move
 
@@ -215,58 +866,9 @@ class MinimaxPlayer(IsolationPlayer):
                 testing.
         """
 
-        def _terminal_test(game):
-            """ Return True if the game is over for the active player
-            and False otherwise.
-            """
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
-            # No more moves? We are finished with the game.
-            if len(game.get_legal_moves()) == 0:
-                return True
-            else:
-                return False
-
-        # best outcome of player 2 (min) given the actions of player 1 (max)
-        def _min_value(game, d):
-            """ Return the value/score for a win if the game is over
-            or reached the appropriate depth in the tree,
-            otherwise return the minimum value over all legal child
-            nodes.
-            """
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
-
-            if _terminal_test(game) or d == 0:
-                return self.score(game, self)
-
-            v = float("inf")
-            moves = game.get_legal_moves()
-            for m in moves:
-                v = min(v, _max_value(game.forecast_move(m), d - 1))
-            return v
-
-        # best outcome of player 1 (max) given the actions of player 2 (min)
-        def _max_value(game, d):
-            """ Return the value for a loss (-1) if the game is over
-            or reached the appropriate depth in the tree,
-            otherwise return the maximum value over all legal child
-            nodes.
-            """
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
-
-            if _terminal_test(game) or d == 0:
-                return self.score(game, self)
-
-            v = float("-inf")
-            moves = game.get_legal_moves()
-            for m in moves:
-                v = max(v, _min_value(game.forecast_move(m), d - 1))
-            return v
-
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        deadline = Deadline(self.time_left, self.TIMER_THRESHOLD)
 
         # For this game governed by the depth limited minimax player strategy
         # Iterate through the legal moves maximizing player 1 (max) return
@@ -275,15 +877,176 @@ class MinimaxPlayer(IsolationPlayer):
         legal_moves = game.get_legal_moves()
         if not legal_moves:
             return (-1, -1)
-        return max(legal_moves, key=lambda m: _min_value(game.forecast_move(m), depth - 1))
+
+        # Search the raw state of the board (see `_Search`), so that the
+        # caller's board is never modified.
+        s = _Search(game, self, deadline.tick, depth)
+        blocked, own, opp = _raw_state(game)
+        try:
+            return _negamax_root(s, blocked, own, opp, game.move_count,
+                                 game.zobrist, depth, legal_moves)
+        finally:
+            if self.stats is not None:
+                _count_search(self.stats, s, deadline)
 
 
 class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    solve_endgames : bool (optional)
+        If True, positions in which the players have been separated are
+        solved exactly with `endgame.solve()` (using at most half of the
+        remaining time) before falling back to iterative deepening. Solved
+        sub-problems are remembered between moves, so a position that could
+        not be solved in time is usually solved on a later turn.
+
+    tt_size : int (optional)
+        The maximum number of search results kept in the transposition
+        table, which is shared by the iterations of iterative deepening and
+        by successive moves. Stored best moves are searched first. Pass 0
+        to search without a table.
+
+    move_ordering : bool (optional)
+        If False, killer moves and history scores are not used to order the
+        moves (see Notes).
+
+    reuse_search : bool (optional)
+        If True, the transposition table, killer moves and history scores
+        are carried over from one move to the next of the same game (older
+        entries and scores losing weight over time), and iterative
+        deepening starts from the depth already searched below the current
+        position. The state is cleared when a new game is detected. If
+        False, every move is searched from scratch.
+
+    ponder : str (optional)
+        If "predicted" or "all", the player searches on the opponent's time
+        in a background process: the position after the reply predicted by
+        the search, or the positions after every reply (predicted one
+        first). `isolation.Board.play` starts pondering once our move has
+        been applied (see `move_applied`, or call `start_pondering()`) and
+        stops it as soon as the opponent has moved, outside of the time
+        limits of both players; the results are then added to the
+        transposition table, so that `get_move` resumes from them when the
+        opponent played a pondered reply. The process runs at the lowest
+        priority, so that it takes little processor time from the players
+        when they share a processor, and the score function must be
+        picklable (e.g., a module level function). Pondering requires a
+        transposition table and `reuse_search`, and is ignored otherwise.
+        Call `close()` to shut the process down.
+
+    workers : int (optional)
+        If given, iterations of at least PARALLEL_MIN_DEPTH plies search the
+        root moves in parallel in a persistent pool of this many worker
+        processes: the first (best known) move is searched first, then the
+        other moves are searched by the workers with its score as alpha.
+        The score function must then be picklable (e.g., a module level
+        function). The pool is started by the constructor, outside of the
+        time limit of any move; call `close()` to shut it down, after which
+        the player searches sequentially.
+
+    pvs : bool (optional)
+        If True, use principal variation search: every move after the first
+        one of a node is searched with a null window, which only tells
+        whether the move is better than the best one so far, and the moves
+        that turn out better are searched again with the full window.
+
+    aspiration_window : float (optional)
+        If given, each iteration of iterative deepening after the first one
+        starts with the window (score - aspiration_window, score +
+        aspiration_window) around the score of the previous iteration, and
+        the iteration is searched again with the full window if the score
+        falls outside of it.
+
+    Attributes
+    ----------
+    completed_depth : int
+        The depth of the last iteration completed by the latest call to
+        `get_move` (0 if no iteration was completed or the position was
+        solved exactly).
+
+    root_score : float
+        The score of the move returned by the latest call to `alphabeta`.
+        If the score is outside of the (alpha, beta) window of the call, it
+        is only a bound of the true score. Won and lost positions score
+        WIN_SCORE and -WIN_SCORE, less the number of moves played at the
+        end of the game (see `solved()`).
+
+    stats : `searchstats.SearchStats`
+        If set, the statistics of the search of every move are recorded in
+        it (None by default). The moves played by the endgame solver are
+        not searched and are not recorded.
+
+    Notes
+    -----
+    Moves are searched in the order: best move stored in the transposition
+    table (the principal variation of the previous iteration), killer moves
+    of the ply (the last moves that caused a cutoff at the same depth of the
+    tree), then the other moves by decreasing history score (the total
+    weight of the cutoffs caused by moving to the same cell). Killer moves
+    and history scores are kept for all the iterations of a `get_move` call
+    (and between calls, see `reuse_search`).
+
+    The game ends are scored by their distance, so that the search prefers
+    the fastest win and the longest loss. Iterative deepening stops as soon
+    as an iteration proves a win or a loss: every leaf of its tree was then
+    a game end, and deeper iterations would return the same move.
     """
 
+    # Maximum number of longest-path results kept between moves
+    ENDGAME_MEMO_SIZE = 500000
+
+    # Default maximum number of transposition table entries
+    TT_SIZE = 2 ** 18
+
+    # Shallower iterations are not worth sending to the worker processes
+    PARALLEL_MIN_DEPTH = 4
+
+    # Zobrist keys do not tell which player the stored values are relative
+    # to, so the keys of the positions searched for the second player are
+    # offset by this constant.
+    SIDE_KEY = 0x5DEECE66D2545F49
+
+    stats = None
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 solve_endgames=True, tt_size=TT_SIZE, move_ordering=True,
+                 pvs=False, aspiration_window=None, reuse_search=True,
+                 ponder=None, workers=None):
+        super().__init__(search_depth, score_fn, timeout)
+        self.solve_endgames = solve_endgames
+        self._endgame_memo = {}
+        self.tt = TranspositionTable(tt_size) if tt_size else None
+        self.move_ordering = move_ordering
+        self.pvs = pvs
+        self.aspiration_window = aspiration_window
+        self.reuse_search = reuse_search
+        self.ponder = ponder
+        self.workers = workers
+        self.completed_depth = 0
+        self._ponder_position = None
+        self._pondering = False
+        self._ponder_process = self._ponder_conn = self._ponder_stop = None
+        # The pondering process is started outside of the time limit of
+        # any move, and talks to the player over a pipe: a pool would add
+        # threads that compete with the search for the interpreter lock.
+        if ponder and self.tt is not None and reuse_search:
+            self._ponder_stop = multiprocessing.Event()
+            self._ponder_conn, conn = multiprocessing.Pipe()
+            self._ponder_process = multiprocessing.Process(
+                target=_ponder_loop, args=(conn, self._ponder_stop))
+            self._ponder_process.daemon = True
+            self._ponder_process.start()
+        self._pool = multiprocessing.Pool(workers) if workers else None
+        self._stop = None
+        self._last_root = None
+        self.root_score = None
+        self._killers = []
+        self._history = defaultdict(int)
+
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -314,31 +1077,258 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
+        self.stop_pondering()
         self.time_left = time_left
+        self.completed_depth = 0
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
         best_move = (-1, -1)
 
+        # Once the players are separated the game can usually be solved
+        # exactly in a fraction of the time needed by the search.
+        if self.solve_endgames:
+            memo = self._endgame_memo.setdefault((game.width, game.height), {})
+            if len(memo) > self.ENDGAME_MEMO_SIZE:
+                memo.clear()
+            threshold = self.TIMER_THRESHOLD + max(0., time_left() - self.TIMER_THRESHOLD) / 2
+            result = endgame.solve(game, time_left, threshold, memo)
+            if result is not None:
+                return result.best_move
+
+        stats = self.stats
+        if stats is not None:
+            stats.start_move(game.move_count, self.tt, _score_cache(self.score))
+        self.root_score = None
+        entry = self._start_search(game)
+        if entry is not None:
+            # Resume from the search of the previous move below this position
+            best_move = entry.move
+            self.root_score = entry.value
+            self.completed_depth = entry.depth
+        depth = self.completed_depth + 1
+
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer expires.
             # Start with a depth of 1 and interatively increase the depth
             # until the timeout occurs and then return the best move
             # found up until that point.
-            depth = 1
-            while True:
-                best_move = self.alphabeta(game, depth)
+            while not self.solved():
+                best_move = self._search_iteration(game, depth)
+                self.completed_depth = depth
                 depth += 1
+                if stats is not None:
+                    stats.end_iteration()
         except SearchTimeout:
             # Handle any actions required after timeout as needed
-            #print("Active: {} Depth Reached: {} Open Moves: {} Best Move {}".format(game.active_player,depth,len(game.get_legal_moves()),best_move))
             pass
 
+        if stats is not None:
+            stats.end_move(self.completed_depth or None)
+
+        # Pondering starts once the move has been applied (see `ponder`)
+        if self._ponder_process is not None and best_move != (-1, -1):
+            self._ponder_position = game.forecast_move(best_move)
+
         # Return the best move from the last completed search iteration
         return best_move
 
-    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+    def solved(self):
+        """Return True if `root_score` is the score of a proven win or loss
+        (a game end that the player to move cannot avoid or delay).
+        """
+        return (self.root_score is not None and
+                abs(self.root_score) >= WIN_SCORE / 2)
+
+    def move_applied(self, move):
+        """Called by `isolation.Board.play` once our move has been applied. """
+        self.start_pondering()
+
+    def opponent_moved(self, move):
+        """Called by `isolation.Board.play` with the move of the opponent. """
+        self.stop_pondering()
+
+    def game_over(self, winner):
+        """Called by `isolation.Board.play` at the end of the game. """
+        self.stop_pondering()
+
+    def close(self):
+        """Shut down the worker processes (see `workers`) and the pondering
+        process (see `ponder`), if any.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if self._ponder_process is not None:
+            if self._pondering:
+                self._ponder_stop.set()
+                self._ponder_conn.recv()
+                self._pondering = False
+            self._ponder_conn.send(None)
+            self._ponder_process.join()
+            self._ponder_conn.close()
+            self._ponder_process = self._ponder_conn = None
+
+    def start_pondering(self, game=None):
+        """Start searching the replies to our move in the pondering process
+        (see `ponder`). `game` is the position after our move, by default
+        the position after the move returned by the last call to `get_move`.
+        """
+        if game is None:
+            game, self._ponder_position = self._ponder_position, None
+        if game is None or self._ponder_process is None or self._pondering:
+            return
+        replies = game.get_legal_moves()
+        entry = self.tt.probe(self._tt_key(game))
+        if entry is not None and entry.move in replies:
+            replies.remove(entry.move)
+            replies.insert(0, entry.move)
+        if self.ponder != "all":
+            replies = replies[:1]
+        positions = [game.forecast_move(m) for m in replies]
+        positions = [p.with_players(*_seats(p, _ROOT_PLAYER))
+                     for p in positions if p.get_legal_moves()]
+        if not positions:
+            return
+        settings = (self.score, self.TIMER_THRESHOLD, self.tt.capacity,
+                    self.move_ordering, self.pvs)
+        self._ponder_stop.clear()
+        self._ponder_conn.send((positions, settings))
+        self._pondering = True
+
+    def stop_pondering(self):
+        """Stop the search started by `start_pondering`, if any, and add its
+        results to the transposition table.
+        """
+        self._ponder_position = None
+        if not self._pondering:
+            return
+        self._ponder_stop.set()
+        self.tt.merge(self._ponder_conn.recv())
+        self._pondering = False
+
+    def _tt_key(self, game):
+        """Return the transposition table key of a position in a game played
+        by this player (see SIDE_KEY).
+        """
+        second = bool(game.move_count & 1) == (game.active_player is self)
+        return game.zobrist ^ (self.SIDE_KEY if second else 0)
+
+    def _same_game(self, game):
+        """Return True if `game` follows the position of the previous call
+        to `get_move`.
+        """
+        if self._last_root is None:
+            return False
+        width, height, move_count, locations = self._last_root
+        if (game.width, game.height) != (width, height) or game.move_count <= move_count:
+            return False
+        # The cells occupied by the players at the previous move are blocked
+        # for the rest of the game
+        return not any(loc is not None and game.move_is_legal(loc)
+                       for loc in locations)
+
+    def _start_search(self, game):
+        """Carry over or clear the search state at the start of a move.
+        Return the exact result stored for the position by the search of
+        the previous move, if any.
+        """
+        if self.reuse_search and self._same_game(game):
+            plies = game.move_count - self._last_root[2]
+        else:
+            plies = None
+        self._last_root = (game.width, game.height, game.move_count,
+                           (game.get_player_location(game.active_player),
+                            game.get_player_location(game.inactive_player)))
+        if plies is None:
+            if self.tt is not None:
+                self.tt.clear()
+            self._killers = []
+            self._history = defaultdict(int)
+            return None
+
+        # The root is now `plies` plies below the previous one: shift the
+        # killer moves accordingly and age the history scores
+        del self._killers[:plies]
+        for m in self._history:
+            self._history[m] //= 2
+        if self.tt is None:
+            return None
+        self.tt.new_search()
+        entry = self.tt.probe(self._tt_key(game))
+        if (entry is None or entry.bound != EXACT or
+                entry.move not in game.get_legal_moves()):
+            return None
+        return entry
+
+    def _search_iteration(self, game, depth):
+        """Run one iteration of iterative deepening (see `aspiration_window`)
+        and return the best move.
+        """
+        if self._pool is not None and depth >= self.PARALLEL_MIN_DEPTH:
+            return self._parallel_alphabeta(game, depth)
+
+        window = self.aspiration_window
+        score = self.root_score
+        if window is None or depth == 1 or score is None:
+            return self.alphabeta(game, depth)
+
+        alpha, beta = score - window, score + window
+        move = self.alphabeta(game, depth, alpha, beta)
+        if alpha < self.root_score < beta:
+            return move
+        return self.alphabeta(game, depth)
+
+    def _parallel_alphabeta(self, game, depth):
+        """Search the root moves in the worker pool (see `workers`) and
+        return the best move, like `alphabeta(game, depth)`.
+        """
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+        key = self._tt_key(game)
+        entry = self.tt.probe(key) if self.tt is not None else None
+        if entry is not None and entry.move in legal_moves:
+            legal_moves.remove(entry.move)
+            legal_moves.insert(0, entry.move)
+
+        # Young brothers wait: the other moves only need to be searched
+        # with the score of the first one as alpha, which is exact.
+        best_move = legal_moves[0]
+        self.alphabeta(game, depth, root_moves=[best_move])
+        best_score = self.root_score
+
+        if len(legal_moves) > 1:
+            board = game.with_players(*_seats(game, _ROOT_PLAYER))
+            deadline = time.monotonic() + self.time_left() / 1000.
+            tt_size = self.tt.capacity if self.tt is not None else 0
+            settings = (self.score, self.TIMER_THRESHOLD, tt_size,
+                        self.move_ordering, self.pvs)
+            tasks = [(board, m, depth, best_score, deadline, settings)
+                     for m in legal_moves[1:]]
+            result = self._pool.map_async(_search_root_move, tasks, chunksize=1)
+            try:
+                scores = result.get(max(0., self.time_left() - self.TIMER_THRESHOLD) / 1000.)
+            except multiprocessing.TimeoutError:
+                raise SearchTimeout()
+            if None in scores:
+                raise SearchTimeout()
+            for m, score in zip(legal_moves[1:], scores):
+                if score > best_score:
+                    best_score, best_move = score, m
+
+        if self.tt is not None:
+            self.tt.store(key, depth, EXACT, best_score, best_move)
+        self.root_score = best_score
+        return best_move
+
+    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"),
+                  root_moves=None):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
 
@@ -366,6 +1356,9 @@ class AlphaBetaPlayer(IsolationPlayer):
         beta : float
             Beta limits the upper bound of search on maximizing layers
 
+        root_moves : list<(int, int)> (optional)
+            If given, only these moves are searched at the root.
+
         Returns
         -------
         (int, int)
@@ -384,69 +1377,43 @@ class AlphaBetaPlayer(IsolationPlayer):
                 testing.
         """
 
-        def _terminal_test(game):
-            """ Return True if the game is over for the active player
-            and False otherwise.
-            """
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
-            # No more moves, we are finished with the game.
-            if len(game.get_legal_moves()) == 0:
-                return True
-            else:
-                return False
-
-        # best outcome of player 2 (min) given the actions of player 1 (max)
-        def _min_value(game, d, alpha, beta):
-            """ Return the value/score for a win if the game is over
-            or reached the appropriate depth in the tree,
-            otherwise return the minimum value over all legal child
-            nodes.
-            """
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
-
-            if _terminal_test(game) or d == 0:
-                return self.score(game, self)
-
-            v = float("inf")
-            moves = game.get_legal_moves()
-            for m in moves:
-                v = min(v, _max_value(game.forecast_move(m), d - 1, alpha, beta))
-                if v <= alpha:
-                    return v
-                beta = min(beta, v)
-            return v
-
-        # best outcome of player 1 (max) given the actions of player 2 (min)
-        def _max_value(game, d, alpha, beta):
-            """ Return the value/score for a loss if the game is over
-            or reached the appropriate depth in the tree,
-            otherwise return the maximum value over all legal child
-            nodes.
-            """
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
-
-            if _terminal_test(game) or d == 0:
-                return self.score(game, self)
-
-            v = float("-inf")
-            moves = game.get_legal_moves()
-            for m in moves:
-                v = max(v, _min_value(game.forecast_move(m), d - 1, alpha, beta))
-                if v >= beta:
-                    return v
-                alpha = max(alpha, v)
-            return v
-
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        deadline = Deadline(self.time_left, self.TIMER_THRESHOLD, self._stop)
 
         legal_moves = game.get_legal_moves()
+        if root_moves is not None:
+            legal_moves = [m for m in legal_moves if m in root_moves]
         if not legal_moves:
             return (-1, -1)
 
+        # Search the raw state of the board (see `_Search`), so that the
+        # caller's board is never modified.
+        s = _Search(game, self, deadline.tick, depth)
+        s.tt = self.tt
+        s.pvs = pvs = self.pvs
+        s.ordering = self.move_ordering
+        s.killers = killers = self._killers
+        s.history = self._history
+        while len(killers) < depth:
+            killers.append([])
+
+        # The player to move at the root is this player, and the values are
+        # relative to it (see SIDE_KEY).
+        move_count = game.move_count
+        s.side = side = self.SIDE_KEY if move_count & 1 else 0
+        root_key = game.zobrist ^ side
+        entry = self.tt.probe(root_key) if self.tt is not None else None
+        if entry is not None and entry.move in legal_moves:
+            legal_moves.remove(entry.move)
+            legal_moves.insert(0, entry.move)
+
+        blocked, own, opp = _raw_state(game)
+        zobrist = game.zobrist
+        if own >= 0:
+            zobrist ^= s.player_keys[move_count & 1][own]
+        move_keys = s.move_keys[move_count & 1]
+
         # begin a depth limited a-b pruning game search with the best score initialized to
         # the first element of the legal moves.
         # best_score (alpha) for player 1 maximizer is intialized to -inf
@@ -456,10 +1423,314 @@ class AlphaBetaPlayer(IsolationPlayer):
         best_score = float("-inf")
         # interate through the legal moves starting with player 2 minimizer.  Player 1 is already
         # on the board.  We are starting at ply 1 hence the reduction in depth of 1
-        for m in legal_moves:
-            the_score = _min_value(game.forecast_move(m), depth - 1, best_score, beta)
-            # Keep the best score and move as we iterate through the possible moves.
-            if the_score > best_score:
-                best_score = the_score
-                best_move = m
+        try:
+            for i, m in enumerate(legal_moves):
+                a = max(alpha, best_score)
+                to = m[0] + m[1] * s.height
+                child = (s, blocked | (1 << to), opp, to, move_count + 1,
+                         zobrist ^ move_keys[to], depth - 1)
+                if pvs and i > 0:
+                    the_score = -_alphabeta(*child, -(a + _NULL_WINDOW), -a)
+                    if a < the_score < beta:
+                        the_score = -_alphabeta(*child, -beta, -a)
+                else:
+                    the_score = -_alphabeta(*child, -beta, -a)
+                # Keep the best score and move as we iterate through the possible moves.
+                if the_score > best_score:
+                    best_score = the_score
+                    best_move = m
+                if best_score >= beta:
+                    break
+        finally:
+            if self.stats is not None:
+                _count_search(self.stats, s, deadline)
+        if root_moves is None and self.tt is not None:
+            if best_score <= alpha:
+                self.tt.store(root_key, depth, UPPER, best_score, best_move)
+            elif best_score >= beta:
+                self.tt.store(root_key, depth, LOWER, best_score, best_move)
+            else:
+                self.tt.store(root_key, depth, EXACT, best_score, best_move)
+        self.root_score = best_score
         return best_move
+
+
+class MCTSPlayer(IsolationPlayer):
+    """Game-playing agent that chooses a move using Monte Carlo tree search
+    with UCT selection. The search runs playouts until the time limit
+    expires, so its strength grows smoothly with the time available, and
+    plays the most visited move.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The exploration constant of the UCT formula: a child is selected by
+        its win rate plus exploration * sqrt(ln(parent visits) / visits).
+
+    playout : str (optional)
+        "random" to play the playouts with uniformly random moves, or
+        "mobility" to move to the cell with the most onward moves (ties
+        broken at random).
+
+    max_nodes : int (optional)
+        The maximum number of nodes of the tree; once it is full, the
+        leaves are no longer expanded.
+
+    reuse_tree : bool (optional)
+        If True, the subtree below the reply of the opponent is kept from
+        one move to the next of the same game.
+
+    seed : hashable (optional)
+        The seed of the random number generator of the playouts.
+
+    Attributes
+    ----------
+    playouts : int
+        The number of playouts run by the latest call to `get_move`.
+
+    playouts_per_second : float
+        The rate of the playouts of the latest call to `get_move`.
+
+    stats : `searchstats.SearchStats`
+        If set, the statistics of the search of every move are recorded in
+        it (None by default), with each playout counted as a node and a
+        leaf. Forced moves are not searched and are not recorded.
+
+    Notes
+    -----
+    The nodes are stored in flat arrays indexed by node number (like the
+    entries of `transposition.TranspositionTable`), and the playouts run on
+    the raw states of the search kernel (see `_Search`). The children of a
+    node are created together, in consecutive slots, the second time the
+    node is reached. The wins of a node are counted for the player who moved
+    into it.
+    """
+
+    # Default maximum number of nodes of the tree
+    MAX_NODES = 2 ** 20
+
+    stats = None
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 exploration=1.4, playout="mobility", max_nodes=MAX_NODES,
+                 reuse_tree=True, seed=None):
+        super().__init__(search_depth, score_fn, timeout)
+        if playout not in ("random", "mobility"):
+            raise ValueError("Unknown playout policy: {}".format(playout))
+        self.exploration = exploration
+        self.playout = playout
+        self.max_nodes = max_nodes
+        self.reuse_tree = reuse_tree
+        self.playouts = 0
+        self.playouts_per_second = 0.
+        self._rng = random.Random(seed)
+        self._root = None
+        self._root_state = None
+        self._clear()
+
+    def get_move(self, game, time_left):
+        """Search for the best move from the available legal moves and return a
+        result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        self.playouts = 0
+        self.playouts_per_second = 0.
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+
+        if self.stats is not None:
+            self.stats.start_move(game.move_count)
+        start = time.perf_counter()
+        root = self._start_search(game)
+        state = self._root_state[1:4]
+        try:
+            if self.time_left() < self.TIMER_THRESHOLD:
+                raise SearchTimeout()
+            tick = Deadline(self.time_left, self.TIMER_THRESHOLD).tick
+            while True:
+                tick()
+                self._run_playout(root, *state)
+                self.playouts += 1
+        except SearchTimeout:
+            pass
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            self.playouts_per_second = self.playouts / elapsed
+        if self.stats is not None:
+            self.stats.add_search(self.playouts, self.playouts)
+            self.stats.end_move()
+
+        best = self._best_child(root)
+        if best < 0:
+            return legal_moves[0]
+        to = self._moves[best]
+        return (to % game.height, to // game.height)
+
+    def _clear(self):
+        """Remove every node of the tree. """
+        self._moves = array('i')      # cell moved to from the parent
+        self._firsts = array('i')     # first child, or -1 if not expanded
+        self._counts = array('i')     # number of children
+        self._visits = array('i')
+        self._wins = array('d')
+
+    def _add_node(self, move):
+        """Append an unexpanded node and return its number. """
+        self._moves.append(move)
+        self._firsts.append(-1)
+        self._counts.append(0)
+        self._visits.append(0)
+        self._wins.append(0.)
+        return len(self._moves) - 1
+
+    def _start_search(self, game):
+        """Return the root node for `game`: the node of the previous tree
+        below our last move and the reply of the opponent, or the root of a
+        new tree.
+        """
+        blocked, own, opp = _raw_state(game)
+        state = ((game.width, game.height), blocked, own, opp, game.move_count)
+        root = None
+        if (self.reuse_tree and self._root_state is not None and
+                self._root_state[0] == state[0] and
+                self._root_state[4] + 2 == game.move_count and
+                len(self._moves) < self.max_nodes):
+            # Our move is now our location, and the reply the opponent's
+            old_blocked = self._root_state[1]
+            if own >= 0 and opp >= 0 and old_blocked | (1 << own) | (1 << opp) == blocked:
+                node = self._child(self._root, own)
+                if node >= 0:
+                    node = self._child(node, opp)
+                if node >= 0:
+                    root = node
+        if root is None:
+            self._clear()
+            root = self._add_node(-1)
+        self._root = root
+        self._root_state = state
+        return root
+
+    def _child(self, node, move):
+        """Return the child of `node` reached by moving to cell `move`, or
+        -1 if it is not in the tree.
+        """
+        first = self._firsts[node]
+        if first < 0:
+            return -1
+        for child in range(first, first + self._counts[node]):
+            if self._moves[child] == move:
+                return child
+        return -1
+
+    def _best_child(self, node):
+        """Return the most visited child of `node`, or -1. """
+        first = self._firsts[node]
+        if first < 0 or not self._counts[node]:
+            return -1
+        visits = self._visits
+        return max(range(first, first + self._counts[node]),
+                   key=visits.__getitem__)
+
+    def _run_playout(self, root, blocked, own, opp):
+        """Select a path from `root` down the tree, expand its leaf, play
+        the game out from there and update the nodes of the path.
+        """
+        neighbors, masks, _, _, full_mask, _, _ = _kernel_tables(*self._root_state[0])
+        moves_to = self._moves
+        firsts = self._firsts
+        counts = self._counts
+        visits = self._visits
+        wins = self._wins
+        exploration = self.exploration
+
+        # Selection
+        path = [root]
+        node = root
+        while firsts[node] >= 0:
+            first = firsts[node]
+            count = counts[node]
+            if not count:
+                break
+            log_n = math.log(visits[node])
+            best = -1
+            best_value = -1.
+            for child in range(first, first + count):
+                n = visits[child]
+                if not n:
+                    best = child
+                    break
+                value = wins[child] / n + exploration * math.sqrt(log_n / n)
+                if value > best_value:
+                    best, best_value = child, value
+            node = best
+            to = moves_to[node]
+            blocked |= 1 << to
+            own, opp = opp, to
+            path.append(node)
+
+        # Expansion, on the second visit of a leaf (and at the root)
+        if (firsts[node] < 0 and (visits[node] or node == root) and
+                len(moves_to) < self.max_nodes):
+            if own < 0:
+                moves = _mask_cells(full_mask & ~blocked)
+            else:
+                moves = [to for bit, to in neighbors[own] if not blocked & bit]
+            self._rng.shuffle(moves)
+            firsts[node] = len(moves_to)
+            counts[node] = len(moves)
+            for to in moves:
+                self._add_node(to)
+            if moves:
+                node = firsts[node]
+                to = moves_to[node]
+                blocked |= 1 << to
+                own, opp = opp, to
+                path.append(node)
+
+        # Playout: count the plies until the player to move is stuck
+        rng = self._rng
+        random_playout = self.playout == "random"
+        plies = 0
+        while True:
+            if own < 0:
+                moves = _mask_cells(full_mask & ~blocked)
+            else:
+                moves = [to for bit, to in neighbors[own] if not blocked & bit]
+            if not moves:
+                break
+            if random_playout or len(moves) == 1:
+                to = moves[int(rng.random() * len(moves))]
+            else:
+                open_cells = ~blocked
+                to = max(moves, key=lambda m: bin(masks[m] & open_cells).count("1") + rng.random())
+            blocked |= 1 << to
+            own, opp = opp, to
+            plies += 1
+
+        # Backpropagation: the player who moved into the last node of the
+        # path wins if the playout has an even number of plies
+        win = 1. if not plies & 1 else 0.
+        for node in reversed(path):
+            visits[node] += 1
+            wins[node] += win
+            win = 1. - win
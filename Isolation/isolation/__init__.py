@@ -8,4 +8,13 @@ legal moves loses, and the opponent is declared the winner.
 """
 
 # Make the Board class available at the root of the module for imports
-from .isolation import Board
+from .isolation import (Board, BoardView, MoveRecord, knight_neighbors,
+                        knight_reach, knight_shifts, latency_summary,
+                        symmetries, transform_move, zobrist_keys)
+from .bitboard import BitBoard
+
+# BoardBatch requires NumPy, which is optional
+try:
+    from .batch import BoardBatch
+except ImportError:
+    pass
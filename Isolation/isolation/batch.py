@@ -0,0 +1,248 @@
+"""
+This file contains the `BoardBatch` class, which stores many Isolation
+positions of the same board size in NumPy arrays so that legal moves,
+mobility and terminal tests can be computed for all of them at once (e.g.,
+to evaluate a whole search frontier or to generate self-play data).
+
+Players are identified by index in this module: 0 for player 1 and 1 for
+player 2. Cells are numbered `row + column * height`, as in `Board`.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from .isolation import Board, knight_neighbors
+
+
+# Shared by every batch of the same size
+@lru_cache(maxsize=None)
+def _neighbor_table(width, height):
+    """Return an array with the knight neighbors of each cell, padded with
+    the index of an extra always-blocked cell. The extra last row is used
+    for players that have not moved yet.
+    """
+    size = width * height
+    table = np.full((size + 1, 8), size, dtype=np.intp)
+    for idx, neighbors in enumerate(knight_neighbors(width, height)):
+        table[idx, :len(neighbors)] = [n for n, _ in neighbors]
+    return table
+
+
+class BoardBatch(object):
+    """A batch of N Isolation positions on boards of the same size.
+
+    Parameters
+    ----------
+    cells : array-like
+        An (N, width * height) array with 1 for each blocked cell and 0 for
+        each open cell.
+
+    locations : array-like
+        An (N, 2) array with the cell index of player 1 and player 2 in each
+        position, or -1 for a player that has not moved yet.
+
+    initiative : array-like
+        An (N,) array with the index of the player to move in each position
+        (0 for player 1, 1 for player 2).
+
+    width : int (optional)
+        The number of columns of the boards.
+
+    height : int (optional)
+        The number of rows of the boards.
+    """
+
+    def __init__(self, cells, locations, initiative, width=7, height=7):
+        self.width = width
+        self.height = height
+        size = width * height
+        cells = np.asarray(cells, dtype=np.uint8).reshape(-1, size)
+
+        # Keep an extra always-blocked column so that padded neighbor
+        # indices can be gathered without masking.
+        self._padded = np.ones((cells.shape[0], size + 1), dtype=np.uint8)
+        self._padded[:, :size] = cells
+        self.locations = np.array(locations, dtype=np.intp).reshape(-1, 2)
+        self.initiative = np.array(initiative, dtype=np.intp).reshape(-1)
+        self._rows = np.arange(cells.shape[0])
+        self._table = _neighbor_table(width, height)
+
+    def __len__(self):
+        return self._padded.shape[0]
+
+    @property
+    def cells(self):
+        """The (N, width * height) array of blocked (1) and open (0) cells.
+        """
+        return self._padded[:, :-1]
+
+    @classmethod
+    def from_boards(cls, boards):
+        """Build a batch from a sequence of `isolation.Board` objects (or
+        any class implementing the same interface) of the same size.
+        """
+        boards = list(boards)
+        width, height = boards[0].width, boards[0].height
+        cells = np.ones((len(boards), width * height), dtype=np.uint8)
+        locations = np.full((len(boards), 2), -1, dtype=np.intp)
+        initiative = np.zeros(len(boards), dtype=np.intp)
+        for i, board in enumerate(boards):
+            if (board.width, board.height) != (width, height):
+                raise ValueError("All boards in a batch must have the same size.")
+            for r, c in board.get_blank_spaces():
+                cells[i, r + c * height] = 0
+            initiative[i] = board.move_count & 1
+            players = (board.active_player, board.inactive_player)
+            if initiative[i]:
+                players = players[::-1]
+            for p, player in enumerate(players):
+                loc = board.get_player_location(player)
+                if loc is not None:
+                    locations[i, p] = loc[0] + loc[1] * height
+        return cls(cells, locations, initiative, width, height)
+
+    def to_boards(self, player_1, player_2, board_class=Board):
+        """Return a list with one board object per position in the batch.
+
+        The positions are rebuilt by replaying moves on new boards, so the
+        result has consistent move counts and Zobrist keys.
+
+        Parameters
+        ----------
+        player_1 : object
+            The object to register as player 1 on each board.
+
+        player_2 : object
+            The object to register as player 2 on each board.
+
+        board_class : class (optional)
+            The board implementation to construct (e.g., `Board` or
+            `BitBoard`).
+
+        Returns
+        -------
+        list<isolation.Board>
+        """
+        boards = []
+        for cells, locations, initiative in zip(self.cells, self.locations,
+                                                self.initiative):
+            board = board_class(player_1, player_2, self.width, self.height)
+            blocked = [int(idx) for idx in np.flatnonzero(cells)]
+            if len(blocked) & 1 != initiative:
+                raise ValueError("The number of blocked cells does not match "
+                                 "the initiative of the position.")
+            others = [idx for idx in blocked if idx not in locations]
+            n_first = (len(blocked) + 1) // 2
+            history = ([], [])
+            for p, loc in enumerate(locations):
+                count = n_first if p == 0 else len(blocked) - n_first
+                if (loc >= 0) != (count > 0):
+                    raise ValueError("The player locations do not match the "
+                                     "blocked cells of the position.")
+                if count:
+                    history[p].extend(others[:count - 1])
+                    history[p].append(int(loc))
+                    others = others[count - 1:]
+            for i in range(len(blocked)):
+                idx = history[i & 1][i >> 1]
+                board.apply_move((idx % self.height, idx // self.height))
+            boards.append(board)
+        return boards
+
+    def _player_locations(self, player):
+        """Return the location of the specified player (an index, an array
+        of indices, or None for the player to move) in each position.
+        """
+        if player is None:
+            player = self.initiative
+        return self.locations[self._rows, player]
+
+    def _neighbors(self, player):
+        """Return the player locations, a mask of the positions in which the
+        player has not moved and the (N, 8) padded neighbor indices.
+        """
+        loc = self._player_locations(player)
+        unplaced = loc < 0
+        return loc, unplaced, self._table[np.where(unplaced, len(self._table) - 1, loc)]
+
+    def legal_moves_mask(self, player=None):
+        """Return an (N, width * height) boolean array marking the legal
+        destination cells of the specified player (0, 1, an (N,) array of
+        player indices, or None for the player to move) in each position.
+        """
+        loc, unplaced, neighbors = self._neighbors(player)
+        rows = self._rows[:, None]
+        mask = np.zeros(self._padded.shape, dtype=bool)
+        mask[rows, neighbors] = self._padded[rows, neighbors] == 0
+        mask = mask[:, :-1]
+        if unplaced.any():
+            mask[unplaced] = self.cells[unplaced] == 0
+        return mask
+
+    def mobility(self, player=None):
+        """Return an (N,) array with the number of legal moves of the
+        specified player (0, 1, an (N,) array of player indices, or None for
+        the player to move) in each position.
+        """
+        loc, unplaced, neighbors = self._neighbors(player)
+        counts = (self._padded[self._rows[:, None], neighbors] == 0).sum(axis=1)
+        if unplaced.any():
+            counts[unplaced] = (self.cells[unplaced] == 0).sum(axis=1)
+        return counts
+
+    def apply_moves(self, moves):
+        """Move the player to move in every position in-place.
+
+        Parameters
+        ----------
+        moves : array-like
+            An (N,) array with the destination cell index of each move.
+        """
+        moves = np.asarray(moves, dtype=np.intp)
+        self._padded[self._rows, moves] = 1
+        self.locations[self._rows, self.initiative] = moves
+        self.initiative ^= 1
+
+    def is_terminal(self):
+        """Return an (N,) boolean array marking the positions in which the
+        player to move has no legal moves.
+        """
+        return self.mobility() == 0
+
+    def utility(self, player):
+        """Return an (N,) float array with +inf in the positions the
+        specified player has won, -inf in the positions they have lost and
+        0 otherwise (see `Board.utility`).
+        """
+        player = np.asarray(player)
+        utility = np.zeros(len(self))
+        over = self.is_terminal()
+        utility[over & (player == self.initiative)] = float("-inf")
+        utility[over & (player != self.initiative)] = float("inf")
+        return utility
+
+
+def improved_score(batch, player):
+    """Vectorized version of `sample_players.improved_score`: the difference
+    in the number of moves available to the two players, or +/-inf in the
+    positions where the game is over.
+
+    Parameters
+    ----------
+    batch : `isolation.BoardBatch`
+        The positions to evaluate.
+
+    player : int or array-like
+        The index of the player to evaluate for (0 or 1) in each position.
+
+    Returns
+    -------
+    numpy.ndarray
+        An (N,) float array with the heuristic value of each position.
+    """
+    player = np.asarray(player)
+    scores = (batch.mobility(player) - batch.mobility(1 - player)).astype(float)
+    utility = batch.utility(player)
+    over = utility != 0
+    scores[over] = utility[over]
+    return scores
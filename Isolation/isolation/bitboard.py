@@ -0,0 +1,338 @@
+"""
+This file contains the `BitBoard` class, an alternative implementation of
+`isolation.Board` that stores the blocked cells of the game as the bits of a
+single integer and generates knight moves from precomputed attack masks.
+
+`BitBoard` is a drop-in replacement for `Board`: it uses the same cell
+numbering (`row + column * height`), the same move encoding and the same
+public methods, so agents and the `play()` referee work with either class.
+"""
+import random
+from functools import lru_cache
+
+from .isolation import Board, knight_neighbors, zobrist_keys
+
+
+# Shared by every board of the same size
+@lru_cache(maxsize=None)
+def knight_tables(width, height):
+    """Return the move generation tables for a board of the given size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    (tuple<int>, tuple<tuple<(int, (int, int))>>, tuple<(int, int)>, int)
+        The knight-attack mask of every cell (bit `i` of mask `k` is set if a
+        knight can jump from cell `k` to cell `i`), the (bit, (row, column))
+        pairs of the knight neighbors of every cell, the (row, column)
+        coordinates of every cell, and a mask with one bit set for each cell
+        on the board.
+    """
+    cells = tuple((idx % height, idx // height)
+                  for idx in range(width * height))
+    # Neighbors in cell order, so that moves are generated in cell order
+    neighbors = tuple(tuple((1 << idx, loc) for idx, loc in sorted(cell_neighbors))
+                      for cell_neighbors in knight_neighbors(width, height))
+    masks = tuple(sum(bit for bit, _ in cell_neighbors)
+                  for cell_neighbors in neighbors)
+    return (masks, neighbors, cells, (1 << (width * height)) - 1)
+
+
+class BitBoard(Board):
+    """Bitboard implementation of the Isolation game model.
+
+    The blocked cells are kept in a single integer and the player locations
+    are kept as cell indices, so copying a board copies a handful of ints and
+    generating moves only tests the precomputed knight neighbors of a cell
+    against the blocked mask.
+
+    Unlike `Board`, legal moves are returned in cell order rather than in a
+    random order unless `shuffle` is set, except for the moves of a player
+    that has not moved yet: like `Board`, the board keeps a list of the open
+    cells during the opening plies and returns a copy of it.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+
+    shuffle : bool (optional)
+        If True, legal moves are returned in a random order; otherwise they
+        are returned in cell order.
+
+    seed : hashable (optional)
+        If not None, the moves are shuffled with a random number generator
+        seeded with this value (shared with every copy of the board) instead
+        of the global `random` module.
+    """
+
+    __slots__ = ('_masks', '_full_mask', '_blocked')
+
+    def __init__(self, player_1, player_2, width=7, height=7, shuffle=False,
+                 seed=None):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        (self._masks, self._neighbors, self._cells,
+         self._full_mask) = knight_tables(width, height)
+        self._blocked = 0
+        self._p1_loc = -1
+        self._p2_loc = -1
+
+        # List of the open cells for the opening plies, as in `Board`
+        self._blanks = list(self._cells)
+        self._blank_pos = list(range(width * height))
+        self._blanks_owned = True
+
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._zobrist = 0
+
+        self._shuffle = shuffle
+        self._rng = random if seed is None else random.Random(seed)
+
+    def state_key(self):
+        """Return a hashable value that exactly identifies the current state
+        (blocked cells, player locations and initiative).
+        """
+        return (self._blocked, self._p1_loc, self._p2_loc,
+                self.move_count & 1)
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = object.__new__(type(self))
+        new_board.width = self.width
+        new_board.height = self.height
+        new_board.move_count = self.move_count
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
+        new_board._active_player = self._active_player
+        new_board._inactive_player = self._inactive_player
+        new_board._masks = self._masks
+        new_board._neighbors = self._neighbors
+        new_board._cells = self._cells
+        new_board._blanks = self._blanks
+        new_board._blank_pos = self._blank_pos
+        new_board._blanks_owned = self._blanks_owned = False
+        new_board._full_mask = self._full_mask
+        new_board._blocked = self._blocked
+        new_board._p1_loc = self._p1_loc
+        new_board._p2_loc = self._p2_loc
+        new_board._zobrist_keys = self._zobrist_keys
+        new_board._zobrist = self._zobrist
+        new_board._shuffle = self._shuffle
+        new_board._rng = self._rng
+        return new_board
+
+    def mobility(self, player=None):
+        """Return the number of legal moves of the specified player (see
+        `Board.mobility`), counted from the attack mask of its cell.
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._location_index(player)
+        if idx < 0:
+            return bin(self._full_mask & ~self._blocked).count("1")
+        return bin(self._masks[idx] & ~self._blocked).count("1")
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not self._blocked >> (move[0] + move[1] * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        # The open cell list is only maintained while a player has yet to
+        # move, when walking every open cell of the mask would be slowest.
+        if self.move_count <= 2:
+            return self._blanks[:]
+        return self._mask_to_moves(self._full_mask & ~self._blocked)
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        idx = self._location_index(player)
+        if idx < 0:
+            return Board.NOT_MOVED
+        return self._cells[idx]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._location_index(player)
+        if idx < 0:
+            moves = self.get_blank_spaces()
+        else:
+            # inlined _moves_from() for speed
+            blocked = self._blocked
+            moves = [cell for bit, cell in self._neighbors[idx]
+                     if not blocked & bit]
+        if self._shuffle:
+            self._rng.shuffle(moves)
+        return moves
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        tuple
+            An undo record that can be passed to `undo_move()` to restore
+            the state of the board before the move was applied.
+        """
+        undo = (self._blocked, self._p1_loc, self._p2_loc, self.move_count,
+                self._zobrist)
+        idx = move[0] + move[1] * self.height
+        cell_keys, player_keys, initiative_key = self._zobrist_keys
+        if self._active_player == self._player_2:
+            location_keys = player_keys[1]
+            last_loc = self._p2_loc
+            self._p2_loc = idx
+        else:
+            location_keys = player_keys[0]
+            last_loc = self._p1_loc
+            self._p1_loc = idx
+        self._zobrist ^= cell_keys[idx] ^ location_keys[idx] ^ initiative_key
+        if last_loc >= 0:
+            self._zobrist ^= location_keys[last_loc]
+        self._blocked |= 1 << idx
+        if self.move_count < 2:
+            self._remove_blank(idx)
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+        return undo
+
+    def undo_move(self, undo):
+        """Take back a move applied with `apply_move()`, restoring the
+        blocked cells, player locations, initiative, move count and Zobrist
+        key.
+
+        Moves must be undone in the reverse order that they were applied.
+
+        Parameters
+        ----------
+        undo : tuple
+            The undo record returned by the matching call to `apply_move()`.
+        """
+        blocked = self._blocked
+        (self._blocked, self._p1_loc, self._p2_loc, self.move_count,
+         self._zobrist) = undo
+        if self.move_count < 2:
+            # The only cell unblocked by the undo
+            self._restore_blank((blocked ^ self._blocked).bit_length() - 1)
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+
+    def _blocked_mask(self):
+        """Return a bitmask with bit `row + column * height` set for each
+        blocked cell.
+        """
+        return self._blocked
+
+    def _set_blocked(self, indices):
+        """Replace the blocked cells with the cells at the given indices. """
+        self._blocked = 0
+        for idx in indices:
+            self._blocked |= 1 << idx
+        self._reset_blanks(self._mask_to_moves(self._full_mask & ~self._blocked))
+
+    def _set_state(self, blocked, p1_loc, p2_loc, move_count, zobrist):
+        """Replace the whole state of the board (see `Board._set_state`). """
+        self._blocked = blocked
+        # The open cell list is only read in the opening plies, so that
+        # later states are set in constant time (e.g., for scoring leaves)
+        if move_count <= 2:
+            self._reset_blanks(self._mask_to_moves(self._full_mask & ~blocked))
+        self._p1_loc = p1_loc
+        self._p2_loc = p2_loc
+        self.move_count = move_count
+        self._zobrist = zobrist
+        if move_count & 1:
+            self._active_player, self._inactive_player = self._player_2, self._player_1
+        else:
+            self._active_player, self._inactive_player = self._player_1, self._player_2
+
+    def _moves_from(self, loc_idx):
+        """Generate the list of possible moves for a knight on the cell with
+        index `loc_idx`, in cell order.
+        """
+        if loc_idx < 0:
+            return self.get_blank_spaces()
+        blocked = self._blocked
+        return [cell for bit, cell in self._neighbors[loc_idx]
+                if not blocked & bit]
+
+    def _mask_to_moves(self, mask):
+        """Convert a mask of cells into a list of (row, column) pairs. """
+        cells = self._cells
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(cells[low.bit_length() - 1])
+            mask ^= low
+        return moves
@@ -7,12 +7,300 @@ You MAY use and modify this class, however ALL function signatures must
 remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
+import math
 import random
 import timeit
-from copy import copy
+from collections import namedtuple
+from functools import lru_cache
+from itertools import compress
 
 TIME_LIMIT_MILLIS = 150
 
+# Timing of a single turn reported by `Board.play()`: the player that moved,
+# the ply number (move count before the move), the wall time spent in
+# get_move() and the time left when it returned (both in milliseconds), and
+# the number of legal moves that were available.
+MoveRecord = namedtuple("MoveRecord", ["player", "ply", "elapsed", "time_left", "legal_moves"])
+
+
+def latency_summary(records, percentiles=(50, 95, 99)):
+    """Aggregate the turn timings recorded by `Board.play()` for each player.
+
+    Parameters
+    ----------
+    records : iterable<MoveRecord>
+        The records passed to the `on_move` callback of `Board.play()`,
+        possibly collected over many games.
+
+    percentiles : iterable<numeric> (optional)
+        The percentiles of the time spent per move to report.
+
+    Returns
+    -------
+    dict
+        A dictionary keyed by player of dictionaries with the number of
+        moves ("count"), the requested percentiles ("p50", "p95", ...) and
+        the maximum ("max") of the time spent per move, and the smallest
+        time left at the end of a move ("min_time_left"), in milliseconds.
+    """
+    by_player = {}
+    for record in records:
+        by_player.setdefault(record.player, []).append(record)
+
+    summary = {}
+    for player, player_records in by_player.items():
+        elapsed = sorted(r.elapsed for r in player_records)
+        stats = {"count": len(elapsed)}
+        for p in percentiles:
+            # nearest-rank percentile
+            rank = max(1, int(math.ceil(p / 100. * len(elapsed))))
+            stats["p{:g}".format(p)] = elapsed[rank - 1]
+        stats["max"] = elapsed[-1]
+        stats["min_time_left"] = min(r.time_left for r in player_records)
+        summary[player] = stats
+    return summary
+
+# Knight moves as (row, column) offsets
+KNIGHT_DIRECTIONS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                     (1, -2), (1, 2), (2, -1), (2, 1))
+
+# The tables of the functions below are shared by every board of the same
+# size: they are computed once per (width, height) by `lru_cache`.
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(width, height):
+    """Return the Zobrist hashing keys for a board of the given size.
+
+    The keys are drawn from a fixed seed so that hashes are reproducible
+    across processes (e.g., for opening books or worker pools).
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    (tuple<int>, (tuple<int>, tuple<int>), int)
+        The 64-bit key of each blocked cell, the keys of each location of
+        player 1 and player 2, and the key xor-ed in while player 2 holds
+        the initiative.
+    """
+    rng = random.Random("{}x{}".format(width, height))
+    size = width * height
+    cell_keys = tuple(rng.getrandbits(64) for _ in range(size))
+    player_keys = (tuple(rng.getrandbits(64) for _ in range(size)),
+                   tuple(rng.getrandbits(64) for _ in range(size)))
+    return (cell_keys, player_keys, rng.getrandbits(64))
+
+
+@lru_cache(maxsize=None)
+def knight_neighbors(width, height):
+    """Return the on-board knight neighbors of each cell of a board of the
+    given size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    tuple<tuple<(int, (int, int))>>
+        For each cell index (`row + column * height`), the (index,
+        (row, column)) pairs of the cells a knight can jump to.
+    """
+    return tuple(
+        tuple((r + dr + (c + dc) * height, (r + dr, c + dc))
+              for dr, dc in KNIGHT_DIRECTIONS
+              if 0 <= r + dr < height and 0 <= c + dc < width)
+        for c in range(width) for r in range(height))
+
+# Translation table turning the bytes of a cell bytearray into open flags
+_OPEN_FLAGS = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+@lru_cache(maxsize=None)
+def _cell_tables(width, height):
+    """Return the (row, column) coordinates of every cell of a board of the
+    given size, the characters of the empty board as printed by
+    `Board.to_string()` and the position of each cell in that text.
+    """
+    cells = tuple((idx % height, idx // height)
+                  for idx in range(width * height))
+    col_margin = len(str(height - 1)) + 1
+    prefix = "{:<" + "{}".format(col_margin) + "}"
+    offset = " " * (col_margin + 3)
+    chars = list(offset + '   '.join(map(str, range(width))) + '\n\r')
+    positions = [0] * (width * height)
+    for i in range(height):
+        chars.extend(prefix.format(i) + ' | ')
+        for j in range(width):
+            positions[i + j * height] = len(chars)
+            chars.extend('  | ')
+        chars.extend('\n\r')
+    return (cells, chars, positions)
+
+# Translation table turning the bytes of a cell bytearray into binary digits
+_MASK_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+@lru_cache(maxsize=None)
+def knight_shifts(width, height):
+    """Return the bit shifts that move a set of cells (a bitmask with bit
+    `row + column * height` set for each cell) one knight move in each
+    direction.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    (list<(int, int)>, list<(int, int)>)
+        The (source mask, shift) pairs of the directions that move a cell
+        to a higher index (shift left) and to a lower index (shift right).
+        Only the cells in the source mask stay on the board after the move.
+    """
+    # The cells that have a neighbor in each direction
+    sources = dict.fromkeys(KNIGHT_DIRECTIONS, 0)
+    for idx, neighbors in enumerate(knight_neighbors(width, height)):
+        r, c = idx % height, idx // height
+        for _, (nr, nc) in neighbors:
+            sources[(nr - r, nc - c)] |= 1 << idx
+    left, right = [], []
+    for dr, dc in KNIGHT_DIRECTIONS:
+        delta = dr + dc * height
+        if delta > 0:
+            left.append((sources[(dr, dc)], delta))
+        else:
+            right.append((sources[(dr, dc)], -delta))
+    return (left, right)
+
+# Index of the inverse of each symmetry returned by `symmetries()`
+_INVERSE_SYMMETRY = (0, 1, 2, 3, 4, 6, 5, 7)
+
+
+@lru_cache(maxsize=None)
+def symmetries(width, height):
+    """Return the cell permutations of the symmetries of a board of the given
+    size. Knight moves are preserved by every one of them.
+
+    The symmetries are, in order: identity, vertical flip, horizontal flip
+    and 180 degree rotation, followed on square boards only by the
+    transpose, 90 degree rotation, 270 degree rotation and anti-transpose.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    tuple<tuple<int>>
+        For each symmetry, the index of the image of each cell index
+        (`row + column * height`).
+    """
+    h, w = height - 1, width - 1
+    maps = [lambda r, c: (r, c), lambda r, c: (h - r, c),
+            lambda r, c: (r, w - c), lambda r, c: (h - r, w - c)]
+    if width == height:
+        maps += [lambda r, c: (c, r), lambda r, c: (c, h - r),
+                 lambda r, c: (w - c, r), lambda r, c: (w - c, h - r)]
+    perms = []
+    for f in maps:
+        perm = [0] * (width * height)
+        for c in range(width):
+            for r in range(height):
+                fr, fc = f(r, c)
+                perm[r + c * height] = fr + fc * height
+        perms.append(tuple(perm))
+    return tuple(perms)
+
+
+def transform_move(move, transform, width, height, inverse=False):
+    """Map a move through one of the board symmetries.
+
+    Parameters
+    ----------
+    move : (int, int)
+        A coordinate pair (row, column); (-1, -1) is returned unchanged.
+
+    transform : int
+        The index of the symmetry in `symmetries(width, height)`, e.g., as
+        returned by `Board.canonical()`.
+
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    inverse : bool (optional)
+        If True, apply the inverse symmetry (e.g., to map a move found on a
+        canonical board back to the original board).
+
+    Returns
+    -------
+    (int, int)
+        The coordinate pair (row, column) of the image of the move.
+    """
+    if move == (-1, -1):
+        return move
+    if inverse:
+        transform = _INVERSE_SYMMETRY[transform]
+    idx = symmetries(width, height)[transform][move[0] + move[1] * height]
+    return (idx % height, idx // height)
+
+
+def knight_reach(start, open_mask, shifts):
+    """Flood fill the cells a knight can reach by repeatedly jumping through
+    open cells.
+
+    Parameters
+    ----------
+    start : int
+        Bitmask of the starting cells (the starting cells are only included
+        in the result if they can be reached again).
+
+    open_mask : int
+        Bitmask of the open cells the knight may jump to.
+
+    shifts : (list<(int, int)>, list<(int, int)>)
+        The shift tables returned by `knight_shifts()` for the board size.
+
+    Returns
+    -------
+    int
+        Bitmask of the reachable cells.
+    """
+    left, right = shifts
+    reach = 0
+    frontier = start
+    while frontier:
+        attacks = 0
+        for src, delta in left:
+            attacks |= (frontier & src) << delta
+        for src, delta in right:
+            attacks |= (frontier & src) >> delta
+        frontier = attacks & open_mask & ~reach
+        reach |= frontier
+    return reach
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -33,11 +321,32 @@ class Board(object):
 
     height : int (optional)
         The number of rows that the board should have.
+
+    shuffle : bool (optional)
+        If True, legal moves are returned in a random order; otherwise they
+        are returned in a fixed order for each cell.
+
+    seed : hashable (optional)
+        If not None, the moves are shuffled with a random number generator
+        seeded with this value (shared with every copy of the board) instead
+        of the global `random` module, so that games are reproducible.
+
+    track_mobility : bool (optional)
+        If True, the number of open knight neighbors of every cell is
+        updated by `apply_move()` and `undo_move()`, so that `mobility()`
+        is a single lookup.
     """
     BLANK = 0
     NOT_MOVED = None
 
-    def __init__(self, player_1, player_2, width=7, height=7):
+    __slots__ = ('width', 'height', 'move_count', '_player_1', '_player_2',
+                 '_active_player', '_inactive_player', '_board_state',
+                 '_p1_loc', '_p2_loc', '_zobrist_keys', '_zobrist',
+                 '_neighbors', '_shuffle', '_rng', '_cells', '_blanks',
+                 '_blank_pos', '_blanks_owned', '_free')
+
+    def __init__(self, player_1, player_2, width=7, height=7, shuffle=True,
+                 seed=None, track_mobility=False):
         self.width = width
         self.height = height
         self.move_count = 0
@@ -46,14 +355,132 @@ class Board(object):
         self._active_player = player_1
         self._inactive_player = player_2
 
-        # The last 3 entries of the board state includes initiative (0 for
-        # player 1, 1 for player 2) player 2 last move, and player 1 last move
-        self._board_state = [Board.BLANK] * (width * height + 3)
-        self._board_state[-1] = Board.NOT_MOVED
-        self._board_state[-2] = Board.NOT_MOVED
+        # One byte per cell (BLANK or 1 for blocked); the players' locations
+        # are kept as cell indices, with -1 for a player that has not moved.
+        self._board_state = bytearray(width * height)
+        self._p1_loc = -1
+        self._p2_loc = -1
+
+        # 64-bit Zobrist key of the current state, updated by apply_move()
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._zobrist = 0
+
+        self._neighbors = knight_neighbors(width, height)
+        self._shuffle = shuffle
+        self._rng = random if seed is None else random.Random(seed)
+
+        # Number of open knight neighbors of every cell (see mobility()), or
+        # None if it is not tracked
+        self._free = None
+        if track_mobility:
+            self._free = bytearray(len(n) for n in self._neighbors)
+
+        # List of the open cells and position of each cell in the list,
+        # maintained by apply_move() for the opening plies (see
+        # get_blank_spaces()) and shared between copies until either board
+        # modifies them.
+        self._cells = _cell_tables(width, height)[0]
+        self._blanks = list(self._cells)
+        self._blank_pos = list(range(width * height))
+        self._blanks_owned = True
 
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the 64-bit Zobrist key of the current state (see
+        `Board.zobrist`).
+        """
+        return self._zobrist
+
+    @property
+    def zobrist(self):
+        """The 64-bit Zobrist key of the current game state. The key covers
+        the blocked cells, the location of each player and the initiative,
+        and it is maintained incrementally by `apply_move()`, so reading it
+        is O(1). Different states can (rarely) share a key; use
+        `same_state()` to rule out collisions.
+        """
+        return self._zobrist
+
+    def state_key(self):
+        """Return a hashable value that exactly identifies the current state
+        (blocked cells, player locations and initiative).
+        """
+        return (bytes(self._board_state), self._p1_loc, self._p2_loc,
+                self.move_count & 1)
+
+    def canonical_key(self):
+        """Return the smallest Zobrist key among the symmetric images of the
+        current state, and the index of the symmetry that produces it (see
+        `symmetries()`). Symmetric positions share the same canonical key.
+
+        Returns
+        -------
+        (int, int)
+            The canonical key and the index of the symmetry.
+        """
+        cell_keys, player_keys, initiative_key = self._zobrist_keys
+        base = initiative_key if self.move_count & 1 else 0
+        blocked = self._mask_to_indices(self._blocked_mask())
+        locations = [(keys, loc) for keys, loc in zip(player_keys, (self._p1_loc, self._p2_loc))
+                     if loc >= 0]
+        best = None
+        for transform, perm in enumerate(symmetries(self.width, self.height)):
+            key = base
+            for idx in blocked:
+                key ^= cell_keys[perm[idx]]
+            for keys, loc in locations:
+                key ^= keys[perm[loc]]
+            if best is None or key < best[0]:
+                best = (key, transform)
+        return best
+
+    def canonical(self):
+        """Return a copy of the board mapped to its canonical orientation
+        (the symmetric image with the smallest Zobrist key) and the index of
+        the symmetry used. Moves on the canonical board can be mapped back
+        with `transform_move(move, transform, width, height, inverse=True)`.
+
+        Returns
+        -------
+        (isolation.Board, int)
+        """
+        _, transform = self.canonical_key()
+        return self.symmetric(transform), transform
+
+    def symmetric(self, transform):
+        """Return a copy of the board mapped through one of the board
+        symmetries.
+
+        Parameters
+        ----------
+        transform : int
+            The index of the symmetry in `symmetries(width, height)`.
+
+        Returns
+        -------
+        isolation.Board
+        """
+        perm = symmetries(self.width, self.height)[transform]
+        cell_keys, player_keys, initiative_key = self._zobrist_keys
+        new_board = self.copy()
+        blocked = [perm[idx] for idx in self._mask_to_indices(self._blocked_mask())]
+        new_board._set_blocked(blocked)
+        new_board._zobrist = initiative_key if self.move_count & 1 else 0
+        for idx in blocked:
+            new_board._zobrist ^= cell_keys[idx]
+        if self._p1_loc >= 0:
+            new_board._p1_loc = perm[self._p1_loc]
+            new_board._zobrist ^= player_keys[0][new_board._p1_loc]
+        if self._p2_loc >= 0:
+            new_board._p2_loc = perm[self._p2_loc]
+            new_board._zobrist ^= player_keys[1][new_board._p2_loc]
+        return new_board
+
+    def same_state(self, other):
+        """Test whether another board of the same class holds exactly the
+        same game state, checking the Zobrist keys first.
+        """
+        return (self.zobrist == other.zobrist and
+                self.state_key() == other.state_key())
 
     @property
     def active_player(self):
@@ -92,13 +519,62 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        # Bypass __init__: the lookup tables are shared and the cells are
+        # copied with a single buffer copy.
+        new_board = object.__new__(type(self))
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
-        new_board._board_state = copy(self._board_state)
+        new_board._board_state = self._board_state[:]
+        new_board._p1_loc = self._p1_loc
+        new_board._p2_loc = self._p2_loc
+        new_board._zobrist_keys = self._zobrist_keys
+        new_board._zobrist = self._zobrist
+        new_board._neighbors = self._neighbors
+        new_board._shuffle = self._shuffle
+        new_board._rng = self._rng
+        new_board._cells = self._cells
+        new_board._blanks = self._blanks
+        new_board._blank_pos = self._blank_pos
+        new_board._blanks_owned = self._blanks_owned = False
+        new_board._free = None if self._free is None else self._free[:]
+        return new_board
+
+    def with_players(self, player_1, player_2):
+        """Return a copy of the board in which `player_1` and `player_2`
+        replace the players of the game (e.g., to hand a position to another
+        process without the player objects).
+        """
+        new_board = self.copy()
+        new_board._player_1 = player_1
+        new_board._player_2 = player_2
+        if self._active_player is self._player_1:
+            new_board._active_player, new_board._inactive_player = player_1, player_2
+        else:
+            new_board._active_player, new_board._inactive_player = player_2, player_1
         return new_board
 
+    def __getstate__(self):
+        # Boards have no __dict__; the global random module cannot be
+        # pickled, so it is restored on unpickling instead.
+        state = dict((name, getattr(self, name))
+                     for cls in type(self).__mro__
+                     for name in getattr(cls, '__slots__', ())
+                     if hasattr(self, name))
+        if state['_rng'] is random:
+            state['_rng'] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        if self._rng is None:
+            self._rng = random
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -139,8 +615,13 @@ class Board(object):
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-                if self._board_state[i + j * self.height] == Board.BLANK]
+        # The list of open cells is only maintained while a player has yet
+        # to move (the only time it is needed to generate moves); later on
+        # the open cells are selected from the cell bytes at C speed.
+        if self.move_count <= 2:
+            return self._blanks[:]
+        return list(compress(self._cells,
+                             self._board_state.translate(_OPEN_FLAGS)))
 
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
@@ -156,17 +637,9 @@ class Board(object):
             The coordinate pair (row, column) of the input player, or None
             if the player has not moved.
         """
-        if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
-        elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
-        else:
-            raise RuntimeError(
-                "Invalid player in get_player_location: {}".format(player))
+        idx = self._location_index(player)
+        if idx < 0:
+            return Board.NOT_MOVED
         w = idx // self.height
         h = idx % self.height
         return (h, w)
@@ -187,8 +660,11 @@ class Board(object):
             for the player constrained by the current game state.
         """
         if player is None:
-            player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+            player = self._active_player
+        moves = self._moves_from(self._location_index(player))
+        if self._shuffle:
+            self._rng.shuffle(moves)
+        return moves
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -198,22 +674,83 @@ class Board(object):
         move : (int, int)
             A coordinate pair (row, column) indicating the next position for
             the active player on the board.
+
+        Returns
+        -------
+        tuple
+            An undo record that can be passed to `undo_move()` to restore
+            the state of the board before the move was applied.
         """
         idx = move[0] + move[1] * self.height
-        last_move_idx = int(self.active_player == self._player_2) + 1
-        self._board_state[-last_move_idx] = idx
+        undo = (idx, self._p1_loc, self._p2_loc, self.move_count,
+                self._zobrist)
+        cell_keys, player_keys, initiative_key = self._zobrist_keys
+        if self._active_player == self._player_2:
+            location_keys = player_keys[1]
+            last_loc = self._p2_loc
+            self._p2_loc = idx
+        else:
+            location_keys = player_keys[0]
+            last_loc = self._p1_loc
+            self._p1_loc = idx
+        self._zobrist ^= cell_keys[idx] ^ location_keys[idx] ^ initiative_key
+        if last_loc >= 0:
+            self._zobrist ^= location_keys[last_loc]
         self._board_state[idx] = 1
-        self._board_state[-3] ^= 1
+        if self.move_count < 2:
+            self._remove_blank(idx)
+        free = self._free
+        if free is not None:
+            for n, _ in self._neighbors[idx]:
+                free[n] -= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
+        return undo
+
+    def undo_move(self, undo):
+        """Take back a move applied with `apply_move()`, restoring the
+        blocked cell, player locations, initiative, move count and Zobrist
+        key.
+
+        Moves must be undone in the reverse order that they were applied.
+
+        Parameters
+        ----------
+        undo : tuple
+            The undo record returned by the matching call to `apply_move()`.
+        """
+        idx, self._p1_loc, self._p2_loc, self.move_count, self._zobrist = undo
+        self._board_state[idx] = Board.BLANK
+        if self.move_count < 2:
+            self._restore_blank(idx)
+        free = self._free
+        if free is not None:
+            for n, _ in self._neighbors[idx]:
+                free[n] += 1
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+
+    def mobility(self, player=None):
+        """Return the number of legal moves of the specified player (the
+        active player if None), like `len(self.get_legal_moves(player))`
+        but without building the list of moves. This is a single lookup on
+        boards created with `track_mobility=True`.
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._location_index(player)
+        if idx < 0:
+            return len(self.get_blank_spaces())
+        if self._free is not None:
+            return self._free[idx]
+        return len(self._moves_from(idx))
 
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self.mobility(self._active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self.mobility(self._active_player)
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +774,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self.mobility(self._active_player):
 
             if player == self._inactive_player:
                 return float("inf")
@@ -247,20 +784,173 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
+    def reachable_cells(self, player):
+        """Return the cells the specified player could eventually reach by
+        moving through open cells if the opponent did not move again.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        list<(int, int)>
+            The coordinate pairs (row, column) of the reachable cells (every
+            blank cell if the player has not moved yet).
+        """
+        idx = self._location_index(player)
+        if idx < 0:
+            return self.get_blank_spaces()
+        return self._mask_to_moves(self._reachable_mask(idx))
+
+    def is_partitioned(self):
+        """Test whether the players have been separated, i.e., neither
+        player can ever reach a cell that the other player could reach, so
+        the rest of the game is two independent longest-path problems.
+
+        Returns
+        -------
+        bool
+            True if both players have moved and their reachable regions are
+            disjoint, False otherwise.
+        """
+        if self._p1_loc < 0 or self._p2_loc < 0:
+            return False
+        # The region of a player is a union of connected components of the
+        # open cells, so the regions overlap iff the other player can jump
+        # into it.
+        region = self._reachable_mask(self._p1_loc)
+        neighbors = knight_neighbors(self.width, self.height)[self._p2_loc]
+        return not any(region >> idx & 1 for idx, _ in neighbors)
+
+    def _blocked_mask(self):
+        """Return a bitmask with bit `row + column * height` set for each
+        blocked cell.
+        """
+        if not self._board_state:
+            return 0
+        return int(self._board_state[::-1].translate(_MASK_DIGITS), 2)
+
+    def _reachable_mask(self, idx):
+        """Return the bitmask of the cells reachable from cell `idx`. """
+        full_mask = (1 << (self.width * self.height)) - 1
+        return knight_reach(1 << idx, full_mask & ~self._blocked_mask(),
+                            knight_shifts(self.width, self.height))
+
+    def _set_blocked(self, indices):
+        """Replace the blocked cells with the cells at the given indices. """
+        self._board_state = bytearray(self.width * self.height)
+        for idx in indices:
+            self._board_state[idx] = 1
+        self._reset_blanks(list(compress(
+            self._cells, self._board_state.translate(_OPEN_FLAGS))))
+        if self._free is not None:
+            board_state = self._board_state
+            self._free = bytearray(sum(not board_state[n] for n, _ in neighbors)
+                                   for neighbors in self._neighbors)
+
+    def _set_state(self, blocked, p1_loc, p2_loc, move_count, zobrist):
+        """Replace the whole state of the board: the bitmask of the blocked
+        cells, the cell index of each player (-1 for a player that has not
+        moved), the move count (which sets the player to move) and the
+        matching Zobrist key.
+        """
+        self._set_blocked(self._mask_to_indices(blocked))
+        self._p1_loc = p1_loc
+        self._p2_loc = p2_loc
+        self.move_count = move_count
+        self._zobrist = zobrist
+        if move_count & 1:
+            self._active_player, self._inactive_player = self._player_2, self._player_1
+        else:
+            self._active_player, self._inactive_player = self._player_1, self._player_2
+
+    def _reset_blanks(self, blanks):
+        """Replace the open cell list (see `get_blank_spaces()`) with
+        `blanks`, a list of the open (row, column) cells.
+        """
+        self._blanks = blanks
+        self._blank_pos = [0] * (self.width * self.height)
+        for pos, (r, c) in enumerate(blanks):
+            self._blank_pos[r + c * self.height] = pos
+        self._blanks_owned = True
+
+    def _own_blanks(self):
+        """Copy the open cell list if it is shared with another board. """
+        if not self._blanks_owned:
+            self._blanks = self._blanks[:]
+            self._blank_pos = self._blank_pos[:]
+            self._blanks_owned = True
+
+    def _remove_blank(self, idx):
+        """Remove cell `idx` from the open cell list by moving the last cell
+        of the list into its place.
+        """
+        self._own_blanks()
+        blanks = self._blanks
+        pos = self._blank_pos[idx]
+        last = blanks.pop()
+        if pos < len(blanks):
+            blanks[pos] = last
+            self._blank_pos[last[0] + last[1] * self.height] = pos
+
+    def _restore_blank(self, idx):
+        """Put cell `idx` back in the open cell list, reversing the matching
+        call to `_remove_blank()` (the position of a removed cell is kept).
+        """
+        self._own_blanks()
+        blanks = self._blanks
+        pos = self._blank_pos[idx]
+        if pos < len(blanks):
+            moved = blanks[pos]
+            self._blank_pos[moved[0] + moved[1] * self.height] = len(blanks)
+            blanks.append(moved)
+            blanks[pos] = self._cells[idx]
+        else:
+            blanks.append(self._cells[idx])
+
+    def _mask_to_indices(self, mask):
+        """Convert a mask of cells into a list of cell indices. """
+        indices = []
+        while mask:
+            low = mask & -mask
+            indices.append(low.bit_length() - 1)
+            mask ^= low
+        return indices
+
+    def _mask_to_moves(self, mask):
+        """Convert a mask of cells into a list of (row, column) pairs. """
+        moves = []
+        while mask:
+            low = mask & -mask
+            idx = low.bit_length() - 1
+            moves.append((idx % self.height, idx // self.height))
+            mask ^= low
+        return moves
+
+    def _location_index(self, player):
+        """Return the cell index of the specified player, or -1 if the
+        player has not moved.
+        """
+        if player == self._player_1:
+            return self._p1_loc
+        elif player == self._player_2:
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _moves_from(self, loc_idx):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell with index `loc_idx`, in a fixed
+        order.
         """
-        if loc == Board.NOT_MOVED:
+        if loc_idx < 0:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
-        return valid_moves
+        board_state = self._board_state
+        return [move for idx, move in self._neighbors[loc_idx]
+                if board_state[idx] == Board.BLANK]
 
     def print_board(self):
         """DEPRECATED - use Board.to_string()"""
@@ -271,61 +961,84 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
-
-        col_margin = len(str(self.height - 1)) + 1
-        prefix = "{:<" + "{}".format(col_margin) + "}"
-        offset = " " * (col_margin + 3)
-        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
-        for i in range(self.height):
-            out += prefix.format(i) + ' | '
-            for j in range(self.width):
-                idx = i + j * self.height
-                if not self._board_state[idx]:
-                    out += ' '
-                elif p1_loc == idx:
-                    out += symbols[0]
-                elif p2_loc == idx:
-                    out += symbols[1]
-                else:
-                    out += '-'
-                out += ' | '
-            out += '\n\r'
-
-        return out
-
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+        # Fill in the blocked cells of a cached rendering of the empty board
+        _, chars, positions = _cell_tables(self.width, self.height)
+        chars = chars[:]
+        for idx in self._mask_to_indices(self._blocked_mask()):
+            chars[positions[idx]] = '-'
+        if self._p1_loc >= 0:
+            chars[positions[self._p1_loc]] = symbols[0]
+        if self._p2_loc >= 0:
+            chars[positions[self._p2_loc]] = symbols[1]
+        return ''.join(chars)
+
+    def play(self, time_limit=TIME_LIMIT_MILLIS, on_move=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
+        Players can also follow the game outside of their time limit (e.g.,
+        to search on the opponent's time) by defining the optional methods
+        `move_applied(move)`, called as soon as the player's own move has
+        been applied, `opponent_moved(move)`, called as soon as the
+        opponent's move has been applied, and `game_over(winner)`, called
+        on both players when the game ends.
+
         Parameters
         ----------
         time_limit : numeric (optional)
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        on_move : callable (optional)
+            A function called with a `MoveRecord` after each call to a
+            player's get_move() (including the final, losing one), e.g.,
+            `records.append`. See `latency_summary()`.
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
             Return multiple including the winning player, the complete game
             move history, and a string indicating the reason for losing
             (e.g., timeout or invalid move).
+
+        Notes
+        -----
+        Each player receives a read-only `BoardView` of the game rather than
+        a copy; it is only valid until get_move() returns.
         """
+        winner = None
+        try:
+            winner, move_history, outcome = self._play(time_limit, on_move)
+            return winner, move_history, outcome
+        finally:
+            for player in (self._player_1, self._player_2):
+                game_over = getattr(player, "game_over", None)
+                if game_over is not None:
+                    game_over(winner)
+
+    def _play(self, time_limit, on_move):
+        """Run the game loop of `play()`. """
         move_history = []
 
         time_millis = lambda: 1000 * timeit.default_timer()
 
         while True:
 
-            legal_player_moves = self.get_legal_moves()
-            game_copy = self.copy()
+            # The referee does not need the moves in random order, and the
+            # players get a copy-on-write view instead of a full copy.
+            legal_player_moves = self._moves_from(self._location_index(self._active_player))
+            game_view = BoardView(self)
 
             move_start = time_millis()
             time_left = lambda : time_limit - (time_millis() - move_start)
-            curr_move = self._active_player.get_move(game_copy, time_left)
+            curr_move = self._active_player.get_move(game_view, time_left)
             move_end = time_left()
 
+            if on_move is not None:
+                on_move(MoveRecord(self._active_player, self.move_count,
+                                   time_limit - move_end, move_end,
+                                   len(legal_player_moves)))
+
             if curr_move is None:
                 curr_move = Board.NOT_MOVED
 
@@ -340,3 +1053,82 @@ class Board(object):
             move_history.append(list(curr_move))
 
             self.apply_move(curr_move)
+
+            # The hooks are called between the turns, so their time is
+            # charged to neither player
+            move_applied = getattr(self._inactive_player, "move_applied", None)
+            if move_applied is not None:
+                move_applied(curr_move)
+            opponent_moved = getattr(self._active_player, "opponent_moved", None)
+            if opponent_moved is not None:
+                opponent_moved(curr_move)
+
+
+def _copy_board(board):
+    """Return a copy of a board (a pickled `BoardView` is loaded as a copy
+    of its board).
+    """
+    return board.copy()
+
+
+class BoardView(object):
+    """Read-only view of a board, handed to the players by `Board.play()`.
+
+    Reads are delegated to the underlying board without copying it. The
+    first call to `apply_move()` or `undo_move()` replaces the underlying
+    board with a private copy (copy-on-write), so a player can never modify
+    the board owned by the referee, and the referee only pays for a copy
+    when a player mutates its view. Other attributes cannot be assigned.
+
+    A view follows the underlying board until it is first mutated, so it
+    must not be kept after get_move() returns (use `copy()` instead).
+    `copy.copy()`, `copy.deepcopy()` and `pickle` turn a view into a copy
+    of the underlying board. Private attributes of the board are not
+    visible through the view.
+
+    Parameters
+    ----------
+    board : isolation.Board
+        The board to view.
+    """
+
+    __slots__ = ('_board', '_owned')
+
+    def __init__(self, board):
+        self._board = board
+        self._owned = False
+
+    def __getattr__(self, name):
+        # Only called for names missing from the view: `_board` and `_owned`
+        # before they are set (e.g., while `copy` or `pickle` builds a new
+        # view), or the private state of the board
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._board, name)
+
+    def __copy__(self):
+        return self._board.copy()
+
+    def __deepcopy__(self, memo):
+        return self._board.copy()
+
+    def __reduce__(self):
+        return _copy_board, (self._board,)
+
+    def apply_move(self, move):
+        """Copy the underlying board if needed, then apply the move to the
+        private copy (see `Board.apply_move()`).
+        """
+        if not self._owned:
+            self._board = self._board.copy()
+            self._owned = True
+        return self._board.apply_move(move)
+
+    def undo_move(self, undo):
+        """Copy the underlying board if needed, then undo the move on the
+        private copy (see `Board.undo_move()`).
+        """
+        if not self._owned:
+            self._board = self._board.copy()
+            self._owned = True
+        self._board.undo_move(undo)
@@ -65,7 +65,7 @@ def open_move_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    return float(len(game.get_legal_moves(player)))
+    return float(game.mobility(player))
 
 
 def improved_score(game, player):
@@ -95,8 +95,8 @@ def improved_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.mobility(player)
+    opp_moves = game.mobility(game.get_opponent(player))
     return float(own_moves - opp_moves)
 
 
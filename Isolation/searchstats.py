@@ -0,0 +1,217 @@
+"""Statistics of the searches run by the players, move by move.
+
+A `SearchStats` is opt-in: assign one to the `stats` attribute of a
+`game_agent.MinimaxPlayer`, `AlphaBetaPlayer` or `MCTSPlayer`, and every
+call to `get_move` adds a `MoveStats` record to it. The records of all the
+moves (of one game or of many) are aggregated by `summary()` and exported
+with `to_json()`, e.g. to compare two versions of an engine:
+
+    player.stats = SearchStats()
+    game.play()
+    print(player.stats.to_json(indent=2))
+
+Only the searches run by `get_move` are counted: searches run while
+pondering, or by the worker processes of a root-parallel search, are not.
+"""
+import json
+import time
+from collections import namedtuple
+
+
+class MoveStats(namedtuple("MoveStats", ["ply", "elapsed", "nodes", "leaves", "depth",
+                                         "iteration_nodes", "expanded", "cutoffs",
+                                         "first_cutoffs", "tt_hits", "tt_probes",
+                                         "cache_hits", "cache_probes"])):
+    """Statistics of the search of a single move.
+
+    Attributes
+    ----------
+    ply : int
+        The move count of the game when the move was searched.
+
+    elapsed : float
+        The wall time spent searching the move (milliseconds).
+
+    nodes : int
+        The number of positions visited by the search (every iteration,
+        including the one interrupted by the timeout).
+
+    leaves : int
+        The number of positions scored by the score function (or the number
+        of playouts of a Monte Carlo tree search).
+
+    depth : int
+        The depth completed by the search, which may have been resumed from
+        the search of an earlier move, or None.
+
+    iteration_nodes : int
+        The number of positions visited by the last iteration completed by
+        this call, or None.
+
+    expanded : int
+        The number of positions whose moves were searched (the others were
+        leaves, game ends or transposition table hits).
+
+    cutoffs, first_cutoffs : int
+        The number of expanded positions whose search stopped at a beta
+        cutoff, and among them the number that stopped after the first move.
+
+    tt_hits, tt_probes, cache_hits, cache_probes : int
+        The number of transposition table and evaluation cache probes, and
+        how many of them found their position.
+    """
+    __slots__ = ()
+
+    @property
+    def nodes_per_second(self):
+        return 1000. * self.nodes / self.elapsed if self.elapsed else None
+
+    @property
+    def cutoff_rate(self):
+        """The fraction of the expanded positions that failed high. """
+        return self.cutoffs / self.expanded if self.expanded else None
+
+    @property
+    def first_cutoff_rate(self):
+        """The fraction of the cutoffs caused by the first move searched,
+        which measures the quality of the move ordering.
+        """
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else None
+
+    @property
+    def branching_factor(self):
+        """The effective branching factor b of the last completed iteration,
+        such that b ** depth = iteration_nodes.
+        """
+        if not self.depth or not self.iteration_nodes:
+            return None
+        return self.iteration_nodes ** (1. / self.depth)
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else None
+
+    @property
+    def cache_hit_rate(self):
+        return self.cache_hits / self.cache_probes if self.cache_probes else None
+
+    def as_dict(self):
+        """Return the counters and the rates of the record in a dict. """
+        stats = self._asdict()
+        for rate in _RATES:
+            stats[rate] = getattr(self, rate)
+        return stats
+
+
+_RATES = ("nodes_per_second", "cutoff_rate", "first_cutoff_rate",
+          "branching_factor", "tt_hit_rate", "cache_hit_rate")
+
+# Counters added up by `SearchStats.add_search()`
+_SEARCH_COUNTERS = ("nodes", "leaves", "expanded", "cutoffs", "first_cutoffs")
+
+
+class SearchStats(object):
+    """Statistics of the searches of a player (see the module documentation).
+
+    The player calls `start_move` at the start of `get_move`, `add_search`
+    after each search (complete or not), `end_iteration` after each
+    completed iteration of iterative deepening, and `end_move` before
+    returning its move.
+
+    Attributes
+    ----------
+    moves : list<MoveStats>
+        The statistics of every move searched since the object was created
+        or cleared.
+    """
+
+    def __init__(self):
+        self.moves = []
+        self._move = None
+
+    def clear(self):
+        """Forget the statistics of every move. """
+        self.moves = []
+        self._move = None
+
+    def start_move(self, ply, tt=None, cache=None):
+        """Start counting the searches of the move at move count `ply`. The
+        hits and misses of `tt` and `cache` (if given) are counted from now
+        on.
+        """
+        self._move = {"ply": ply, "start": time.perf_counter(),
+                      "iteration_start": 0, "iteration_nodes": None,
+                      "tables": [(t, t.hits, t.misses) if t is not None else None
+                                 for t in (tt, cache)]}
+        for counter in _SEARCH_COUNTERS:
+            self._move[counter] = 0
+
+    def add_search(self, nodes, leaves=0, expanded=0, cutoffs=0, first_cutoffs=0):
+        """Add the counters of a search to the current move (searches run
+        outside of `start_move` and `end_move` are ignored).
+        """
+        move = self._move
+        if move is None:
+            return
+        move["nodes"] += nodes
+        move["leaves"] += leaves
+        move["expanded"] += expanded
+        move["cutoffs"] += cutoffs
+        move["first_cutoffs"] += first_cutoffs
+
+    def end_iteration(self):
+        """Mark the end of a completed iteration of iterative deepening. """
+        move = self._move
+        if move is not None:
+            move["iteration_nodes"] = move["nodes"] - move["iteration_start"]
+            move["iteration_start"] = move["nodes"]
+
+    def end_move(self, depth=None):
+        """Record the statistics of the current move, whose search completed
+        `depth` plies, and return them.
+        """
+        move, self._move = self._move, None
+        if move is None:
+            return None
+        elapsed = 1000. * (time.perf_counter() - move["start"])
+        probes = []
+        for table in move["tables"]:
+            if table is None:
+                probes.extend((0, 0))
+            else:
+                t, hits, misses = table
+                probes.extend((t.hits - hits, t.hits + t.misses - hits - misses))
+        record = MoveStats(move["ply"], elapsed, move["nodes"], move["leaves"],
+                           depth, move["iteration_nodes"], move["expanded"],
+                           move["cutoffs"], move["first_cutoffs"], *probes)
+        self.moves.append(record)
+        return record
+
+    def summary(self):
+        """Return the statistics of all the recorded moves in a dict: the
+        number of moves ("moves"), the totals of the counters of `MoveStats`,
+        the rates computed from the totals, and the mean completed depth
+        ("depth") and effective branching factor ("branching_factor") of
+        the moves that completed an iteration.
+        """
+        totals = MoveStats(None, *(sum(getattr(m, field) or 0 for m in self.moves)
+                                   for field in MoveStats._fields[1:]))
+        summary = totals.as_dict()
+        del summary["ply"], summary["iteration_nodes"]
+        summary["moves"] = len(self.moves)
+        summary["depth"] = _mean(m.depth for m in self.moves)
+        summary["branching_factor"] = _mean(m.branching_factor for m in self.moves)
+        return summary
+
+    def to_json(self, **kwargs):
+        """Return the statistics of every move and their summary as a JSON
+        document; the keyword arguments are passed to `json.dumps`.
+        """
+        return json.dumps({"moves": [m.as_dict() for m in self.moves],
+                           "summary": self.summary()}, **kwargs)
+
+
+def _mean(values):
+    """Return the mean of the values that are not None, or None. """
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
@@ -17,10 +17,10 @@ import warnings
 
 from collections import namedtuple
 
-from isolation import Board
+from isolation import Board, latency_summary
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
-from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score, custom_score_2, custom_score_3)
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, MCTSPlayer, custom_score, custom_score_2, custom_score_3)
 
 NUM_MATCHES = 50      # number of matches against each opponent
 TIME_LIMIT  = 150     # number of milliseconds before timeout
@@ -30,18 +30,21 @@ This script evaluates the performance of the custom_score evaluation
 function against a baseline agent using alpha-beta search and iterative
 deepening (ID) called `AB_Improved`. The three `AB_Custom` agents use
 ID and alpha-beta search with the custom_score functions defined in
-game_agent.py.
+game_agent.py. The `MCTS` agent uses Monte Carlo tree search instead.
 """
 
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+def play_round(cpu_agent, test_agents, win_counts, num_matches, on_move=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+
+    The optional `on_move` callback receives the timing record of every
+    turn (see `Board.play()`).
     """
     timeout_count = 0
     forfeit_count = 0
@@ -59,7 +62,7 @@ def play_round(cpu_agent, test_agents, win_counts, num_matches):
 
         # play all games and tally the results
         for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
+            winner, _, termination = game.play(time_limit=TIME_LIMIT, on_move=on_move)
             win_counts[winner] += 1
 
             if termination == "timeout":
@@ -82,6 +85,7 @@ def play_matches(cpu_agents, test_agents, num_matches):
     total_timeouts = 0.
     total_forfeits = 0.
     total_matches = 2 * num_matches * len(cpu_agents)
+    move_records = []
 
     print("\n{:^9}{:^13}".format("Match #", "Opponent") + ''.join(['{:^13}'.format(x[1].name) for x in enumerate(test_agents)]))
     print("{:^9}{:^13} ".format("", "") +  ' '.join(['{:^5}| {:^5}'.format("Won", "Lost") for x in enumerate(test_agents)]))
@@ -92,7 +96,7 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        counts = play_round(agent, test_agents, wins, num_matches, move_records.append)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
         total_wins = update(total_wins, wins)
@@ -113,6 +117,8 @@ def play_matches(cpu_agents, test_agents, num_matches):
             ) for x in enumerate(test_agents)
     ]))
 
+    print_latencies(test_agents, latency_summary(move_records))
+
     if total_timeouts:
         print(("\nThere were {} timeouts during the tournament -- make sure " +
                "your agent handles search timeout correctly, and consider " +
@@ -123,15 +129,33 @@ def play_matches(cpu_agents, test_agents, num_matches):
                "legal moves available to play.\n").format(total_forfeits))
 
 
+def print_latencies(test_agents, summary):
+    """Print the distribution of the time (in milliseconds) that each test
+    agent spent per move, to help tune the agents' timeout margins.
+    """
+    print("\n{:^22}".format("Move time (ms):") +
+          ''.join(['{:^13}'.format(x[1].name) for x in enumerate(test_agents)]))
+    for stat in ["p50", "p95", "p99", "max", "min_time_left"]:
+        print('{:^22}'.format(stat) + ''.join([
+            '{:^13}'.format("{:.1f}".format(summary[x[1].player][stat])
+                            if x[1].player in summary else "-")
+            for x in enumerate(test_agents)
+        ]))
+
+
 def main():
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
     test_agents = [
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, pvs=True), "AB_PVS"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, pvs=True,
+                              aspiration_window=2.), "AB_PVS_Asp"),
         Agent(AlphaBetaPlayer(score_fn=custom_score,timeout=50.), "MinDist2Opp"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_2,timeout=50.), "DiffDist2Ctr"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_3,timeout=50.), "OpenComplex"),
+        Agent(MCTSPlayer(), "MCTS"),
       ]
 
     # Define a collection of agents to compete against the test agents
@@ -0,0 +1,185 @@
+"""Bounded transposition table for alpha-beta search.
+
+Positions are looked up by their 64-bit Zobrist key (see
+`isolation.Board.zobrist`). The table has a fixed number of buckets, each
+holding two entries: a depth-preferred entry, which is only replaced by a
+search at least as deep, and an always-replace entry, which takes every
+other result. The depth of the entries left over from earlier moves is
+discounted by two plies per move, so that stale entries give way to the
+results of the current search.
+The number of entries never exceeds the capacity given to the constructor,
+so the memory used by the table is bounded.
+
+The entries are stored in flat arrays of numbers rather than in Python
+objects: the garbage collector never scans them, so a large table does not
+lengthen the pauses of the collector during the search, and each entry
+takes about 30 bytes.
+"""
+from array import array
+from collections import namedtuple
+
+# Bound types of the stored values
+EXACT = 0   # the value is the exact minimax value of the position
+LOWER = 1   # the search failed high: the value is a lower bound
+UPPER = 2   # the search failed low: the value is an upper bound
+
+
+class TTEntry(namedtuple("TTEntry", ["key", "depth", "bound", "value", "move", "generation"])):
+    """A search result stored in a `TranspositionTable`.
+
+    Attributes
+    ----------
+    key : int
+        The full Zobrist key of the position, used to detect collisions
+        between positions that share a bucket.
+
+    depth : int
+        The number of plies searched below the position.
+
+    bound : int
+        One of EXACT, LOWER or UPPER.
+
+    value : float
+        The value found by the search, to be read according to `bound`.
+
+    move : (int, int)
+        The best move found by the search, or None.
+
+    generation : int
+        The value of `TranspositionTable.generation` when the entry was
+        stored.
+    """
+    __slots__ = ()
+
+
+class TranspositionTable(object):
+    """A fixed-size table of search results keyed by Zobrist key.
+
+    Parameters
+    ----------
+    max_entries : int
+        The maximum number of entries held by the table (at least 2). The
+        table uses the largest power of two of buckets (of two entries) that
+        fits.
+
+    Attributes
+    ----------
+    hits : int
+        The number of calls to `probe` that found their key.
+
+    misses : int
+        The number of calls to `probe` that did not find their key.
+    """
+
+    def __init__(self, max_entries):
+        if max_entries < 2:
+            raise ValueError("A transposition table holds at least 2 entries.")
+        buckets = 1
+        while 4 * buckets <= max_entries:
+            buckets *= 2
+        self._mask = buckets - 1
+        self._size = 2 * buckets
+        self.generation = 0
+        # The entries stored before this generation were cleared
+        self._first_generation = 0
+        size = self._size
+        self._keys = array('Q', bytes(8 * size))
+        self._depths = array('i', bytes(4 * size))
+        self._bounds = array('b', bytes(size))
+        self._values = array('d', bytes(8 * size))
+        # Moves are stored as (row << 8) | column, or -1 for None
+        self._moves = array('i', [-1]) * size
+        # The generation of each entry, or -1 for an empty slot
+        self._generations = array('i', [-1]) * size
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        first = self._first_generation
+        return sum(1 for g in self._generations if g >= first)
+
+    @property
+    def capacity(self):
+        """The number of entries the table can hold. """
+        return self._size
+
+    def new_search(self):
+        """Mark every stored entry as left over from an earlier search (see
+        the module documentation).
+        """
+        self.generation += 1
+
+    def clear(self):
+        """Remove every entry from the table. The arrays and the counters
+        are kept: the entries of the earlier generations are only treated
+        as empty slots, so clearing a large table costs nothing during a
+        search.
+        """
+        self.generation += 1
+        self._first_generation = self.generation
+
+    def export(self, min_depth=0):
+        """Return the entries stored since the last call to `new_search` or
+        `clear` that are at least `min_depth` plies deep, packed in arrays
+        (e.g., to send them to another process, see `merge`).
+        """
+        generation = self.generation
+        depths = self._depths
+        slots = [i for i, g in enumerate(self._generations)
+                 if g == generation and depths[i] >= min_depth]
+        return tuple(array(column.typecode, [column[i] for i in slots])
+                     for column in (self._keys, self._depths, self._bounds,
+                                    self._values, self._moves))
+
+    def merge(self, entries):
+        """Store the entries returned by the `export` method of a table. """
+        for key, depth, bound, value, move in zip(*entries):
+            self.store(key, depth, bound, value,
+                       None if move < 0 else (move >> 8, move & 255))
+
+    def _entry(self, i):
+        move = self._moves[i]
+        return TTEntry(self._keys[i], self._depths[i], self._bounds[i],
+                       self._values[i], None if move < 0 else (move >> 8, move & 255),
+                       self._generations[i])
+
+    def probe(self, key):
+        """Return the `TTEntry` stored for `key`, or None. """
+        i = (key & self._mask) << 1
+        keys = self._keys
+        first = self._first_generation
+        if keys[i] == key and self._generations[i] >= first:
+            self.hits += 1
+            return self._entry(i)
+        if keys[i + 1] == key and self._generations[i + 1] >= first:
+            self.hits += 1
+            return self._entry(i + 1)
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, bound, value, move):
+        """Store the result of a search of `depth` plies below the position
+        with Zobrist key `key`.
+        """
+        i = (key & self._mask) << 1
+        generations = self._generations
+        deep_gen = generations[i]
+        empty = deep_gen < self._first_generation
+        if (empty or self._keys[i] == key or
+                depth >= self._depths[i] - 2 * (self.generation - deep_gen)):
+            # Demote the previous depth-preferred result instead of losing it
+            if not empty and self._keys[i] != key:
+                self._move_slot(i, i + 1)
+        else:
+            i += 1
+        self._keys[i] = key
+        self._depths[i] = depth
+        self._bounds[i] = bound
+        self._values[i] = value
+        self._moves[i] = -1 if move is None else (move[0] << 8) | move[1]
+        generations[i] = self.generation
+
+    def _move_slot(self, src, dst):
+        for column in (self._keys, self._depths, self._bounds, self._values,
+                       self._moves, self._generations):
+            column[dst] = column[src]